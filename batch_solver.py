@@ -0,0 +1,107 @@
+"""
+Solve many start/goal queries on one grid.Grid across worker processes.
+
+The grid's cell codes and passability are copied once into shared memory; each
+worker attaches to it when it starts, so a task is just a pair of cell indices
+and nothing per-cell is ever pickled.  Paths come back in the order asked for.
+"""
+import multiprocessing
+import os
+from multiprocessing import shared_memory, util
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import pathfinding
+
+Search = Callable[..., Optional[List[int]]]
+
+_worker = {}  # state of the grid attached in a worker process
+
+
+class SharedGrid:
+    """
+    The parts of a grid.Grid the searches use, backed by a shared memory block.
+    """
+
+    def __init__(self, buffer, rows: int, cols: int, walkable: bytes) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 2
+        size = (rows + 2) * self.stride
+        self.cells = buffer[:size]
+        self.passable = buffer[size:2 * size]
+        self.walkable = walkable
+        self.offsets = (-self.stride, self.stride, -1, 1)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+
+def _attach(name: str, rows: int, cols: int, walkable: bytes, search: Search, costs) -> None:
+    memory = shared_memory.SharedMemory(name=name)
+    _worker["memory"] = memory  # keep the block mapped for the life of the worker
+    _worker["grid"] = SharedGrid(memory.buf, rows, cols, walkable)
+    _worker["search"] = search
+    _worker["costs"] = costs
+    # spawned workers exit cleanly, so the views have to go before the block is closed
+    util.Finalize(None, _detach, exitpriority=10)
+
+
+def _detach() -> None:
+    grid = _worker.pop("grid")
+    grid.cells.release()
+    grid.passable.release()
+    _worker.pop("memory").close()
+
+
+def _solve(pair: Tuple[int, int]) -> Optional[List[int]]:
+    start, goal = pair
+    if _worker["costs"] is None:
+        return _worker["search"](_worker["grid"], start, goal)
+    return _worker["search"](_worker["grid"], start, goal, _worker["costs"])
+
+
+def solve_many(
+        grid,
+        pairs: Sequence[Tuple[int, int]],
+        processes: Optional[int] = None,
+        search: Search = pathfinding.grid_astar,
+        costs: Optional[Sequence[float]] = None,
+) -> List[Optional[List[int]]]:
+    """
+    Solve every (start, goal) pair, spread over a pool of worker processes.
+
+    Workers are spawned rather than forked so they don't inherit the display or any
+    other SDL state from a game that called pygame.init().
+
+    :param grid: The grid.Grid to search, it is shared with the workers once.
+    :param pairs: (start, goal) cell indices.
+    :param processes: Worker processes, one per core when not given; 1 solves in this process.
+    :param search: A module level grid search called as search(grid, start, goal[, costs]).
+    :param costs: Per cell code cost table passed on to the search when given.
+    :return: The path (or None) for each pair, in order.
+    """
+    if processes == 1:
+        if costs is None:
+            return [search(grid, start, goal) for start, goal in pairs]
+        return [search(grid, start, goal, costs) for start, goal in pairs]
+
+    size = len(grid.cells)
+    memory = shared_memory.SharedMemory(create=True, size=2 * size)
+    try:
+        memory.buf[:size] = grid.cells
+        memory.buf[size:2 * size] = grid.passable
+        initargs = (memory.name, grid.rows, grid.cols, bytes(grid.walkable), search, costs)
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes, initializer=_attach, initargs=initargs) as pool:
+            # a few chunks per worker keeps them all busy without many round trips
+            workers = processes or os.cpu_count() or 1
+            chunksize = max(1, len(pairs) // (workers * 4))
+            paths = pool.map(_solve, pairs, chunksize)
+            # leaving the block would terminate() the workers, which can hang once SDL
+            # is up; let them finish on their own instead
+            pool.close()
+            pool.join()
+            return paths
+    finally:
+        memory.close()
+        memory.unlink()
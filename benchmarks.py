@@ -0,0 +1,251 @@
+"""
+Pathfinding benchmarks run on mazes from Maze._randomly_fill.
+
+    python benchmarks.py                             # the suite, printed as a table
+    python benchmarks.py --output results.json       # ... and saved
+    python benchmarks.py --baseline results.json     # exits non-zero on a regression
+    python benchmarks.py --jps                       # grid_astar against grid_jps
+
+The suite runs dfs, bfs and astar on a corpus of seeded random mazes at several
+sizes and densities plus a few worst case layouts, so the same command gives the
+same mazes on every machine.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pathfinding
+from maze_game import Colour, Location, Maze, manhattan_distance
+
+DENSITY = 0.3  # the sparseness Maze fills with by default
+
+
+def random_maze(rows: int, seed: int, density: float = DENSITY) -> Maze:
+    maze = Maze((rows, rows), 1, rng=random.Random(seed))
+    if density != DENSITY:
+        maze.rng = random.Random(seed)
+        maze.cells = maze._randomly_fill(density)
+    return maze
+
+
+def open_maze(rows: int) -> Maze:
+    """
+    No obstacles at all: every search has the most ties to break.
+    """
+    return random_maze(rows, 0, 0.0)
+
+
+def sealed_maze(rows: int) -> Maze:
+    """
+    An open maze whose goal is walled off, so every search explores everything and fails.
+    """
+    maze = open_maze(rows)
+    goal = maze.goal
+    maze.paint(Location(goal.row - 1, goal.col), Colour.BLOCKED)
+    maze.paint(Location(goal.row, goal.col - 1), Colour.BLOCKED)
+    return maze
+
+
+def serpentine_maze(rows: int) -> Maze:
+    """
+    Walls across every other row with the gap at alternating ends: the only path
+    snakes through the whole maze and the heuristic keeps pointing the wrong way.
+    """
+    maze = open_maze(rows)
+    for row in range(1, rows - 1, 2):
+        gap = rows - 1 if row % 4 == 1 else 0
+        for col in range(rows):
+            if col != gap:
+                maze.paint(Location(row, col), Colour.BLOCKED)
+    return maze
+
+
+WORST_CASES: Dict[str, Callable[[int], Maze]] = {
+    "open": open_maze,
+    "sealed": sealed_maze,
+    "serpentine": serpentine_maze,
+}
+
+
+def corpus(
+        sizes: Iterable[int] = (20, 50, 100),
+        densities: Iterable[float] = (0.1, 0.3, 0.45),
+        seeds: Iterable[int] = range(3),
+) -> Iterator[Tuple[dict, Maze]]:
+    """
+    The mazes to benchmark on, each with a description of how it was made.
+    """
+    sizes, densities, seeds = list(sizes), list(densities), list(seeds)
+    for size in sizes:
+        for density in densities:
+            for seed in seeds:
+                yield {"case": "random", "size": size, "density": density, "seed": seed}, random_maze(size, seed, density)
+        for name, build in WORST_CASES.items():
+            yield {"case": name, "size": size, "density": None, "seed": None}, build(size)
+
+
+def _run(name: str, maze: Maze) -> Tuple[Optional[pathfinding.Node], int]:
+    """
+    One search on maze; nodes expanded are counted as calls to successors so every
+    search is measured the same way.
+    """
+    expanded = 0
+
+    def successors(loc: Location) -> List[Location]:
+        nonlocal expanded
+        expanded += 1
+        return maze.successors(loc)
+
+    if name == "dfs":
+        node = pathfinding.dfs(maze.start, maze.goal_test, successors)
+    elif name == "bfs":
+        node = pathfinding.bfs(maze.start, maze.goal_test, successors)
+    else:
+        node = pathfinding.astar(maze.start, maze.goal_test, successors, manhattan_distance(maze.goal))
+    return node, expanded
+
+
+SEARCHES = ("dfs", "bfs", "astar")
+
+
+def benchmark(mazes: Iterable[Tuple[dict, Maze]], searches: Iterable[str] = SEARCHES, repeat: int = 3) -> List[dict]:
+    """
+
+    :param mazes: (description, maze) pairs, see corpus().
+    :param searches: Names of the searches to run on each maze.
+    :param repeat: Timed runs per search, the fastest is kept.
+    :return: A result per maze and search: seconds, expanded, peak_bytes and length
+        (0 when there is no path) along with the maze's description.
+    """
+    searches = list(searches)
+    results = []
+    for case, maze in mazes:
+        for name in searches:
+            seconds = float("inf")
+            for _ in range(repeat):
+                began = time.perf_counter()
+                node, expanded = _run(name, maze)
+                seconds = min(seconds, time.perf_counter() - began)
+
+            # tracing slows everything down, so memory gets a run of its own
+            tracemalloc.start()
+            try:
+                _run(name, maze)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            length = len(pathfinding.node_to_path(node)) if node is not None else 0
+            results.append(dict(case, search=name, seconds=seconds, expanded=expanded, peak_bytes=peak, length=length))
+    return results
+
+
+def _key(result: dict) -> tuple:
+    return result["case"], result["size"], result["density"], result["seed"], result["search"]
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float = 0.25, floor: float = 0.001) -> List[str]:
+    """
+    Everything that got worse than the baseline.
+
+    :param tolerance: How much slower (or bigger) a result may be, as a fraction of the baseline.
+    :param floor: Time differences below this many seconds are noise and never count.
+    :return: A line per regression, empty when there are none.
+    """
+    before = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+        name = "{search} on {case} size={size} density={density} seed={seed}".format(**result)
+        if result["length"] != old["length"]:
+            regressions.append(f"{name}: path length {old['length']} -> {result['length']}")
+        if result["expanded"] > old["expanded"]:
+            regressions.append(f"{name}: expanded {old['expanded']} -> {result['expanded']}")
+        if result["seconds"] > old["seconds"] * (1 + tolerance) and result["seconds"] - old["seconds"] > floor:
+            regressions.append(f"{name}: {old['seconds'] * 1000:.2f}ms -> {result['seconds'] * 1000:.2f}ms")
+        if result["peak_bytes"] > old["peak_bytes"] * (1 + tolerance):
+            regressions.append(f"{name}: peak memory {old['peak_bytes']} -> {result['peak_bytes']} bytes")
+    return regressions
+
+
+def compare_jps(sizes: Iterable[int] = (50, 200, 500), seeds: Iterable[int] = range(5)) -> List[dict]:
+    """
+    Time grid_astar against grid_jps on the same mazes.
+    """
+    results = []
+    for size in sizes:
+        for seed in seeds:
+            maze = random_maze(size, seed)
+            grid = maze.grid
+            start = grid.index(maze.start.row, maze.start.col)
+            goal = grid.index(maze.goal.row, maze.goal.col)
+            for search in (pathfinding.grid_astar, pathfinding.grid_jps):
+                stats = pathfinding.SearchStats()
+                began = time.perf_counter()
+                path = search(grid, start, goal, stats=stats)
+                results.append({
+                    "search": search.__name__,
+                    "size": size,
+                    "seed": seed,
+                    "seconds": time.perf_counter() - began,
+                    "expanded": stats.expanded,
+                    "length": len(path) if path else 0,
+                })
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.1, 0.3, 0.45])
+    parser.add_argument("--seeds", type=int, default=3, help="random mazes per size and density")
+    parser.add_argument("--searches", nargs="+", choices=SEARCHES, default=list(SEARCHES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against, regressions exit with 1")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--jps", action="store_true", help="time grid_astar against grid_jps instead")
+    args = parser.parse_args(argv)
+
+    if args.jps:
+        for result in compare_jps():
+            print(
+                f"{result['search']:>12} {result['size']:>5} seed={result['seed']} "
+                f"{result['seconds'] * 1000:8.2f}ms expanded={result['expanded']:>7} length={result['length']}"
+            )
+        return 0
+
+    results = benchmark(corpus(args.sizes, args.densities, range(args.seeds)), args.searches, args.repeat)
+    for result in results:
+        density = "" if result["density"] is None else f"{result['density']:.2f}"
+        seed = "" if result["seed"] is None else result["seed"]
+        print(
+            f"{result['search']:>6} {result['case']:>10} {result['size']:>5} {density:>5} {seed!s:>3} "
+            f"{result['seconds'] * 1000:9.2f}ms expanded={result['expanded']:>7} "
+            f"peak={result['peak_bytes'] // 1024:>6}KiB length={result['length']}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+Connected-component labels over a grid.Grid for constant time reachability.
+
+Every passable cell carries the label of the component it belongs to, so whether
+two cells are connected is one comparison -- no search, and no exhausting the
+whole maze to find out there is no path.  The labels watch the grid:
+
+- a cell opening up joins the components around it; the smaller ones are
+  relabelled into the biggest
+- a cell closing can split its component; searches from the cell's open
+  neighbours run in lockstep and stop as soon as they have all met, so only a
+  part that really was cut off is walked to the end (and relabelled), and the
+  biggest part is never walked at all
+"""
+from array import array
+from collections import deque
+from typing import Collection, Deque, Dict, Iterable, List
+
+NONE = -1  # the label of cells that aren't passable
+
+
+class Components:
+    def __init__(self, grid) -> None:
+        self.grid = grid
+        self.labels = array("i", [NONE]) * len(grid)
+        self.sizes: Dict[int, int] = {}  # label -> cells in the component
+        self.relabelled = 0  # cells relabelled by edits so far
+        self._next = 0
+
+        passable, labels = grid.passable, self.labels
+        for index in range(len(grid)):
+            if passable[index] and labels[index] == NONE:
+                label = self._new_label()
+                self.sizes[label] = self._flood(index, label)
+        grid.subscribe(self.cell_changed)
+
+    def detach(self) -> None:
+        self.grid.unsubscribe(self.cell_changed)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def _new_label(self) -> int:
+        label = self._next
+        self._next += 1
+        return label
+
+    def _flood(self, seed: int, label: int) -> int:
+        """
+        Give label to every passable cell connected to seed, returns how many changed.
+        """
+        labels, passable, offsets = self.labels, self.grid.passable, self.grid.offsets
+        labels[seed] = label
+        stack: List[int] = [seed]
+        count = 1
+        while stack:
+            current = stack.pop()
+            for offset in offsets:
+                child = current + offset
+                if passable[child] and labels[child] != label:
+                    labels[child] = label
+                    stack.append(child)
+                    count += 1
+        return count
+
+    def reachable(self, a: int, b: int) -> bool:
+        label = self.labels[a]
+        return label != NONE and label == self.labels[b]
+
+    def component(self, index: int) -> int:
+        return self.labels[index]
+
+    def cell_changed(self, index: int, old: int, new: int) -> None:
+        """
+        Grid listener: keep the labels right when a cell's passability flips.
+        """
+        walkable = self.grid.walkable
+        if walkable[old] == walkable[new]:
+            return
+        if walkable[new]:
+            self._opened(index)
+        else:
+            self._closed(index)
+
+    def _opened(self, index: int) -> None:
+        labels, sizes = self.labels, self.sizes
+        around = {labels[index + offset] for offset in self.grid.offsets} - {NONE}
+        if not around:
+            label = self._new_label()
+            labels[index] = label
+            sizes[label] = 1
+            return
+
+        biggest = max(around, key=sizes.__getitem__)
+        labels[index] = biggest
+        sizes[biggest] += 1
+        for offset in self.grid.offsets:
+            label = labels[index + offset]
+            if label != NONE and label != biggest:
+                count = self._flood(index + offset, biggest)
+                self.relabelled += count
+                sizes[biggest] += count
+                del sizes[label]
+
+    def _parts(self, seeds: List[int], label: int, blocked: Collection[int] = ()) -> List[List[int]]:
+        """
+        Search the cells of label from every seed at once, a step each in turn, until
+        at most one search is still going.  Searches that run into each other join up;
+        one that runs out of cells before meeting the others has found a part of the
+        component cut off from them.
+
+        :param blocked: Cells of label to treat as closed.
+        :return: The cells of each part that was cut off.  The search left going
+            isn't finished, it holds whatever else is left of the component.
+        """
+        labels, passable, offsets = self.labels, self.grid.passable, self.grid.offsets
+        owner: Dict[int, int] = {}  # cell -> the search that reached it first
+        joined = list(range(len(seeds)))  # search -> the search it joined up with
+        frontiers: List[Deque[int]] = []
+        found: List[List[int]] = []
+        for search, seed in enumerate(seeds):
+            owner[seed] = search
+            frontiers.append(deque([seed]))
+            found.append([seed])
+
+        def root(search: int) -> int:
+            while joined[search] != search:
+                search = joined[search]
+            return search
+
+        going = list(range(len(seeds)))  # searches not finished or joined up yet
+        parts = []
+        while len(going) > 1:
+            for search in list(going):
+                if len(going) < 2:
+                    break
+                if search not in going:
+                    continue  # joined up with another search earlier this round
+                if not frontiers[search]:
+                    parts.append(found[search])
+                    going.remove(search)
+                    continue
+                current = frontiers[search].popleft()
+                for offset in offsets:
+                    child = current + offset
+                    if not passable[child] or labels[child] != label or child in blocked:
+                        continue
+                    other = owner.get(child)
+                    if other is None:
+                        owner[child] = search
+                        frontiers[search].append(child)
+                        found[search].append(child)
+                        continue
+                    other = root(other)
+                    if other != search:
+                        # the same part after all: the bigger search carries on for both
+                        if len(found[other]) > len(found[search]):
+                            search, other = other, search
+                        joined[other] = search
+                        frontiers[search].extend(frontiers[other])
+                        found[search].extend(found[other])
+                        going.remove(other)
+        return parts
+
+    def _closed(self, index: int) -> None:
+        labels, sizes, passable = self.labels, self.sizes, self.grid.passable
+        old = labels[index]
+        if old == NONE:
+            return
+        labels[index] = NONE
+        sizes[old] -= 1
+
+        neighbours = [index + offset for offset in self.grid.offsets if passable[index + offset]]
+        if len(neighbours) < 2:
+            # nothing left to split
+            if not sizes[old]:
+                del sizes[old]
+            return
+
+        # the parts cut off get labels of their own, whatever is left keeps the old one
+        for part in self._parts(neighbours, old):
+            label = self._new_label()
+            for cell in part:
+                labels[cell] = label
+            sizes[label] = len(part)
+            sizes[old] -= len(part)
+            self.relabelled += len(part)
+
+    def would_disconnect(self, cells: Iterable[int], a: int, b: int) -> bool:
+        """
+        Whether blocking cells would cut a off from b.  Only searches (within a's
+        component) when one of the cells is in that component, and then only until
+        the cells around the blocked ones have found each other again, as for a
+        closing cell.
+        """
+        if not self.reachable(a, b):
+            return False  # there is nothing left to cut
+        labels = self.labels
+        label = labels[a]
+        cut = {cell for cell in cells if labels[cell] == label}
+        if not cut:
+            return False
+        if a in cut or b in cut:
+            return True
+
+        passable, offsets = self.grid.passable, self.grid.offsets
+        seeds = []
+        for cell in cut:
+            for offset in offsets:
+                child = cell + offset
+                if passable[child] and labels[child] == label and child not in cut and child not in seeds:
+                    seeds.append(child)
+        for part in self._parts(seeds, label, cut):
+            cells = set(part)
+            if (a in cells) != (b in cells):
+                return True
+        return False
@@ -0,0 +1,122 @@
+"""
+Shared distance map (flow field) towards a single goal on a grid.Grid.
+
+One breadth first search from the goal gives every cell its step distance to the
+goal; any number of agents can then read their next step by looking at their four
+neighbours for one that is a step closer.  The field watches the grid and repairs
+itself when cells are blocked or opened, touching only the cells whose distance
+actually changed.
+"""
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from typing import Deque, List, Optional, Set
+
+UNREACHABLE = 2 ** 31 - 1
+
+
+class FlowField:
+    def __init__(self, grid, goal: int) -> None:
+        self.grid = grid
+        self.goal = goal
+        self.distance = array("i", [UNREACHABLE]) * len(grid)
+        self._changed: Set[int] = set()
+        self._build()
+        grid.subscribe(self.cell_changed)
+
+    def detach(self) -> None:
+        self.grid.unsubscribe(self.cell_changed)
+
+    def _build(self) -> None:
+        distance, passable, offsets = self.distance, self.grid.passable, self.grid.offsets
+        if not passable[self.goal]:
+            return
+        distance[self.goal] = 0
+        frontier: Deque[int] = deque([self.goal])
+        while frontier:
+            current = frontier.popleft()
+            step = distance[current] + 1
+            for offset in offsets:
+                child = current + offset
+                if passable[child] and distance[child] == UNREACHABLE:
+                    distance[child] = step
+                    frontier.append(child)
+
+    def cell_changed(self, index: int, old: int, new: int) -> None:
+        """
+        Grid listener: remember cells whose passability flipped.
+        """
+        walkable = self.grid.walkable
+        if walkable[old] != walkable[new]:
+            self._changed.add(index)
+
+    def refresh(self) -> None:
+        """
+        Apply pending grid changes to the field.
+        """
+        if not self._changed:
+            return
+        changed, self._changed = self._changed, set()
+        distance, passable, offsets = self.distance, self.grid.passable, self.grid.offsets
+
+        # 1. cells whose shortest route went through a now blocked cell lose their
+        #    distance, along with anything downstream of them
+        invalid: List[int] = []
+        orphans: Deque[int] = deque()
+        for index in changed:
+            if not passable[index] and distance[index] != UNREACHABLE:
+                distance[index] = UNREACHABLE
+                orphans.append(index)
+        while orphans:
+            current = orphans.popleft()
+            for offset in offsets:
+                child = current + offset
+                step = distance[child]
+                if step == UNREACHABLE or step == 0:
+                    continue
+                if not any(distance[child + o] == step - 1 for o in offsets):
+                    distance[child] = UNREACHABLE
+                    invalid.append(child)
+                    orphans.append(child)
+
+        # 2. re-seed the invalidated and newly opened cells from their neighbours
+        #    and let the improvement flow outwards
+        if self.goal in changed and passable[self.goal]:
+            distance[self.goal] = 0
+        frontier: List = []
+        for index in invalid + [i for i in changed if passable[i]]:
+            best = min(distance[index + offset] for offset in offsets)
+            if best != UNREACHABLE and best + 1 < distance[index]:
+                distance[index] = best + 1
+            if distance[index] != UNREACHABLE:
+                heappush(frontier, (distance[index], index))
+        while frontier:
+            step, current = heappop(frontier)
+            if step != distance[current]:
+                continue
+            for offset in offsets:
+                child = current + offset
+                if passable[child] and step + 1 < distance[child]:
+                    distance[child] = step + 1
+                    heappush(frontier, (step + 1, child))
+
+    def reachable(self, index: int) -> bool:
+        self.refresh()
+        return self.distance[index] != UNREACHABLE
+
+    def next_step(self, index: int) -> Optional[int]:
+        """
+        The neighbouring cell one step closer to the goal, the goal itself when there,
+        or None when the goal can't be reached from index.
+        """
+        self.refresh()
+        distance = self.distance
+        step = distance[index]
+        if step == UNREACHABLE:
+            return None
+        if step == 0:
+            return index
+        for offset in self.grid.offsets:
+            if distance[index + offset] == step - 1:
+                return index + offset
+        return None
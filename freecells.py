@@ -0,0 +1,46 @@
+"""
+Set of free cells with O(1) add, remove and uniform random sampling.
+
+The cells live in a list with a map from cell to its position in the list.
+Removing swaps the last cell into the hole, so nothing ever shifts, and sampling
+is a single random index however full the board is.
+"""
+import random
+from typing import Dict, Generic, Hashable, Iterable, List, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+
+class FreeCells(Generic[T]):
+    def __init__(self, cells: Iterable[T] = ()) -> None:
+        self._cells: List[T] = list(cells)
+        self._where: Dict[T, int] = {cell: i for i, cell in enumerate(self._cells)}
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, cell: T) -> bool:
+        return cell in self._where
+
+    def __iter__(self):
+        return iter(self._cells)
+
+    def add(self, cell: T) -> None:
+        if cell not in self._where:
+            self._where[cell] = len(self._cells)
+            self._cells.append(cell)
+
+    def discard(self, cell: T) -> None:
+        i = self._where.pop(cell, None)
+        if i is None:
+            return
+        last = self._cells.pop()
+        if i < len(self._cells):
+            # fill the hole with the last cell
+            self._cells[i] = last
+            self._where[last] = i
+
+    def sample(self, rng: random.Random = random) -> T:
+        if not self._cells:
+            raise IndexError("there are no free cells left")
+        return self._cells[rng.randrange(len(self._cells))]
@@ -0,0 +1,311 @@
+"""
+Maze generators that build a grid.Grid directly, guaranteed solvable.
+
+- random_fill: the same kind of maze as Maze._randomly_fill, but the cell codes for
+  a whole row come from one random byte string mapped through a lookup table
+  (bytes.translate), so nothing is done per cell in Python.  A union-find pass
+  over runs of open cells then checks the start and goal are connected, and if they
+  aren't a corridor is opened between them -- no trial search is ever run.
+- backtracker, kruskal, wilson: classic perfect mazes (exactly one path between any
+  two rooms).  Rooms sit on even rows and columns with walls between them, so they
+  are solvable by construction.
+
+Every generator returns (grid, start, goal) like mazefile.load, and `generate`
+wraps one in a Maze.
+"""
+import random
+import re
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+
+from grid import BORDER, Grid
+from maze_game import CELL_CODE, Colour, Location, Maze
+
+Cell = Tuple[int, int]
+Level = Tuple[Grid, Cell, Cell]
+
+EMPTY = CELL_CODE[Colour.EMPTY]
+BLOCKED = CELL_CODE[Colour.BLOCKED]
+SNACK = CELL_CODE[Colour.SNACK]
+
+_OPEN_RUN = re.compile(b"\x01+")
+
+
+class UnionFind:
+    """
+    Disjoint sets over 0..size-1 with union by size and path halving.
+    """
+
+    def __init__(self, size: int = 0) -> None:
+        self.parent = array("i", range(size))
+        self.size = array("i", [1]) * size
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self) -> int:
+        """
+        A new set of its own, returns its element.
+        """
+        element = len(self.parent)
+        self.parent.append(element)
+        self.size.append(1)
+        return element
+
+    def find(self, element: int) -> int:
+        parent = self.parent
+        while parent[element] != element:
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, a: int, b: int) -> bool:
+        """
+        Join the sets of a and b, False when they were already the same set.
+        """
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+
+def _to_grid(codes: bytearray, rows: int, cols: int) -> Grid:
+    """
+    Wrap rows * cols playable cell codes in a border and hand them to a Grid.
+    """
+    stride = cols + 2
+    cells = bytearray([BORDER]) * ((rows + 2) * stride)
+    for row in range(rows):
+        start = (row + 1) * stride + 1
+        cells[start:start + cols] = codes[row * cols:(row + 1) * cols]
+    return Grid.from_buffer(rows, cols, cells, blocked=(BLOCKED,))
+
+
+def connected(grid: Grid, a: int, b: int) -> bool:
+    """
+    Whether two grid indices are joined by open cells, from a union-find over the runs
+    of open cells in each row: a run is joined to every run it touches in the row above.
+    """
+    if not (grid.passable[a] and grid.passable[b]):
+        return False
+    # runs are numbered in the order found; parent is the union-find forest over them
+    parent: List[int] = []
+    label = {}  # a and b -> their run
+    above: List[Tuple[int, int]] = []  # (start, end) spans of the previous row, offset by a row
+    first_above = 0  # number of the first run in the previous row
+    passable, stride = grid.passable, grid.stride
+    for row in range(1, grid.rows + 1):
+        offset = row * stride
+        spans = [match.span() for match in _OPEN_RUN.finditer(passable, offset + 1, offset + grid.cols + 1)]
+        first = len(parent)
+        parent.extend(range(first, first + len(spans)))
+        if offset <= a < offset + stride or offset <= b < offset + stride:
+            for i, (start, end) in enumerate(spans):
+                for cell in (a, b):
+                    if start <= cell < end:
+                        label[cell] = first + i
+
+        j = 0
+        for i, (start, end) in enumerate(spans):
+            start -= stride
+            end -= stride
+            # runs above that overlap this one; both lists are in column order
+            while j < len(above) and above[j][1] <= start:
+                j += 1
+            k = j
+            while k < len(above) and above[k][0] < end:
+                # union the run above into this run's set
+                x = first_above + k
+                while parent[x] != x:
+                    parent[x] = x = parent[parent[x]]
+                y = first + i
+                while parent[y] != y:
+                    parent[y] = y = parent[parent[y]]
+                parent[x] = y
+                k += 1
+        above, first_above = spans, first
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    return find(label[a]) == find(label[b])
+
+
+def _open_corridor(codes: bytearray, cols: int, start: Cell, goal: Cell) -> None:
+    # along the start's row, then down the goal's column, opening anything blocked
+    (start_row, start_col), (goal_row, goal_col) = start, goal
+    step = 1 if goal_col >= start_col else -1
+    for col in range(start_col, goal_col + step, step):
+        if codes[start_row * cols + col] == BLOCKED:
+            codes[start_row * cols + col] = EMPTY
+    step = 1 if goal_row >= start_row else -1
+    for row in range(start_row, goal_row + step, step):
+        if codes[row * cols + goal_col] == BLOCKED:
+            codes[row * cols + goal_col] = EMPTY
+
+
+def random_fill(rows: int, cols: int, sparseness: float = 0.3, rng: Optional[random.Random] = None) -> Level:
+    """
+    A maze like Maze._randomly_fill's: a cell is filled with chance sparseness and a
+    filled cell is a snack one time in six, otherwise blocked.  The chances are
+    rounded to multiples of 1/256.
+    """
+    rng = rng or random.Random()
+    filled = round(256 * sparseness)
+    snacks = round(filled / 6)
+    table = bytes(SNACK if value < snacks else BLOCKED if value < filled else EMPTY for value in range(256))
+    codes = bytearray(rng.randbytes(rows * cols).translate(table))
+
+    start, goal = (0, 0), (rows - 1, cols - 1)
+    codes[0] = CELL_CODE[Colour.START]
+    codes[-1] = CELL_CODE[Colour.GOAL]
+    grid = _to_grid(codes, rows, cols)
+    if not connected(grid, grid.index(*start), grid.index(*goal)):
+        _open_corridor(codes, cols, start, goal)
+        grid = _to_grid(codes, rows, cols)
+    return grid, start, goal
+
+
+def _rooms(rows: int, cols: int) -> Tuple[int, int]:
+    return (rows + 1) // 2, (cols + 1) // 2
+
+
+def _carve(rows: int, cols: int, passages: List[Tuple[int, int]]) -> Level:
+    """
+    Turn a spanning tree of rooms into cell codes: rooms and the passages between
+    them open, everything else blocked.
+
+    :param passages: Pairs of room numbers (row * room cols + col) that are joined.
+    """
+    room_rows, room_cols = _rooms(rows, cols)
+    codes = bytearray([BLOCKED]) * (rows * cols)
+    for room_row in range(room_rows):
+        start = 2 * room_row * cols
+        codes[start:start + cols:2] = bytes([EMPTY]) * room_cols
+    for a, b in passages:
+        a_row, a_col = divmod(a, room_cols)
+        b_row, b_col = divmod(b, room_cols)
+        codes[(a_row + b_row) * cols + a_col + b_col] = EMPTY  # the wall half way between
+
+    start, goal = (0, 0), (2 * (room_rows - 1), 2 * (room_cols - 1))
+    codes[0] = CELL_CODE[Colour.START]
+    codes[goal[0] * cols + goal[1]] = CELL_CODE[Colour.GOAL]
+    return _to_grid(codes, rows, cols), start, goal
+
+
+def _neighbours(room: int, room_rows: int, room_cols: int) -> List[int]:
+    row, col = divmod(room, room_cols)
+    found = []
+    if row > 0:
+        found.append(room - room_cols)
+    if row < room_rows - 1:
+        found.append(room + room_cols)
+    if col > 0:
+        found.append(room - 1)
+    if col < room_cols - 1:
+        found.append(room + 1)
+    return found
+
+
+def backtracker(rows: int, cols: int, rng: Optional[random.Random] = None) -> Level:
+    """
+    Recursive backtracker (randomised depth first search), done with an explicit
+    stack: long winding corridors and few dead ends.
+    """
+    rng = rng or random.Random()
+    room_rows, room_cols = _rooms(rows, cols)
+    visited = bytearray(room_rows * room_cols)
+    visited[0] = 1
+    stack = [0]
+    passages = []
+    while stack:
+        room = stack[-1]
+        options = [n for n in _neighbours(room, room_rows, room_cols) if not visited[n]]
+        if not options:
+            stack.pop()
+            continue
+        nxt = rng.choice(options)
+        visited[nxt] = 1
+        passages.append((room, nxt))
+        stack.append(nxt)
+    return _carve(rows, cols, passages)
+
+
+def kruskal(rows: int, cols: int, rng: Optional[random.Random] = None) -> Level:
+    """
+    Randomised Kruskal: knock down walls in random order whenever the rooms on either
+    side aren't joined yet.  Lots of short dead ends.
+    """
+    rng = rng or random.Random()
+    room_rows, room_cols = _rooms(rows, cols)
+    walls = []
+    for room in range(room_rows * room_cols):
+        row, col = divmod(room, room_cols)
+        if col < room_cols - 1:
+            walls.append((room, room + 1))
+        if row < room_rows - 1:
+            walls.append((room, room + room_cols))
+    rng.shuffle(walls)
+
+    sets = UnionFind(room_rows * room_cols)
+    passages = [(a, b) for a, b in walls if sets.union(a, b)]
+    return _carve(rows, cols, passages)
+
+
+def wilson(rows: int, cols: int, rng: Optional[random.Random] = None) -> Level:
+    """
+    Wilson's algorithm: loop-erased random walks from each room not yet in the maze
+    until they hit it.  Every perfect maze is equally likely.
+    """
+    rng = rng or random.Random()
+    room_rows, room_cols = _rooms(rows, cols)
+    total = room_rows * room_cols
+    in_maze = bytearray(total)
+    in_maze[rng.randrange(total)] = 1
+    heading = array("i", [-1]) * total  # where the current walk last left each room
+    passages = []
+    for first in range(total):
+        if in_maze[first]:
+            continue
+        # walk until the maze is hit; later exits overwrite earlier ones, which erases loops
+        room = first
+        while not in_maze[room]:
+            heading[room] = rng.choice(_neighbours(room, room_rows, room_cols))
+            room = heading[room]
+        room = first
+        while not in_maze[room]:
+            in_maze[room] = 1
+            passages.append((room, heading[room]))
+            room = heading[room]
+    return _carve(rows, cols, passages)
+
+
+GENERATORS: Dict[str, Callable[..., Level]] = {
+    "random": random_fill,
+    "backtracker": backtracker,
+    "kruskal": kruskal,
+    "wilson": wilson,
+}
+
+
+def generate(method: str = "random", rows: int = 50, cols: int = 50, seed: Optional[int] = None, cell_size: int = 10) -> Maze:
+    """
+    A Maze around a generated grid.
+
+    :param method: One of GENERATORS.
+    :param seed: Makes the same maze every time when given.
+    """
+    grid, start, goal = GENERATORS[method](rows, cols, rng=random.Random(seed))
+    maze = Maze((cols * cell_size, rows * cell_size), cell_size, grid)
+    maze.start = Location(*start)
+    maze.goal = Location(*goal)
+    return maze
@@ -0,0 +1,136 @@
+"""
+Compact array-backed grid used by the grid-specialised searches in pathfinding.py.
+
+Cells are stored row-major in a flat bytearray with a one cell border of blocked
+cells wrapped around the playable area.  The border means a neighbour lookup is
+just `index + offset` with no bounds checks, which is what makes the searches fast.
+
+- `cells` holds a small integer cell code per cell (the game decides what they mean)
+- `passable` holds 1/0 per cell and is kept in sync with `cells` by `set`
+"""
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+BORDER = 255  # cell code used for the padding around the playable area
+BLOCK = 1 << 16  # bytes of a buffer without find/translate (a memoryview) read at a time
+
+
+class Grid:
+    def __init__(self, rows: int, cols: int, blocked: Iterable[int] = (1,), fill: int = 0) -> None:
+        """
+
+        :param rows: Number of playable rows.
+        :param cols: Number of playable columns.
+        :param blocked: Cell codes that can't be walked through.
+        :param fill: Cell code the playable area starts with.
+        """
+        self._prepare(rows, cols, blocked)
+
+        size = (rows + 2) * self.stride
+        self.cells = bytearray([BORDER]) * size
+        self.passable = bytearray(size)
+        row = bytes([fill]) * cols
+        row_open = bytes([self.walkable[fill]]) * cols
+        for r in range(rows):
+            start = (r + 1) * self.stride + 1
+            self.cells[start:start + cols] = row
+            self.passable[start:start + cols] = row_open
+
+    @classmethod
+    def from_buffer(cls, rows: int, cols: int, cells, blocked: Iterable[int] = (1,)) -> "Grid":
+        """
+        A grid over an existing buffer of cell codes, border included, without copying
+        it -- a bytearray, or an mmap opened for copy-on-write.  Only `passable` is built.
+        """
+        grid = cls.__new__(cls)
+        grid._prepare(rows, cols, blocked)
+        if len(cells) != (rows + 2) * grid.stride:
+            raise ValueError(f"{len(cells)} cell codes can't be a {rows} x {cols} grid with its border")
+        grid.cells = cells
+        if isinstance(cells, bytearray):
+            grid.passable = cells.translate(grid.walkable)
+        else:
+            # a block at a time, so the buffer is never copied whole
+            grid.passable = bytearray(len(cells))
+            for start in range(0, len(cells), BLOCK):
+                grid.passable[start:start + BLOCK] = bytes(cells[start:start + BLOCK]).translate(grid.walkable)
+        return grid
+
+    def _prepare(self, rows: int, cols: int, blocked: Iterable[int]) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 2
+        self.walkable = bytearray(256)  # lookup table: cell code -> 1 if passable
+        blocked = set(blocked)
+        for code in range(256):
+            self.walkable[code] = 0 if code in blocked or code == BORDER else 1
+
+        # up, down, left, right -- the same order as Maze.successors
+        self.offsets: Tuple[int, ...] = (-self.stride, self.stride, -1, 1)
+        self.version = 0
+        self._listeners: List[Callable[[int, int, int], None]] = []
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def index(self, row: int, col: int) -> int:
+        return (row + 1) * self.stride + col + 1
+
+    def location(self, index: int) -> Tuple[int, int]:
+        row, col = divmod(index, self.stride)
+        return row - 1, col - 1
+
+    def get(self, row: int, col: int) -> int:
+        return self.cells[self.index(row, col)]
+
+    def set(self, row: int, col: int, code: int) -> None:
+        """
+        Update a cell code and notify anyone watching the grid of the change.
+        """
+        index = self.index(row, col)
+        old = self.cells[index]
+        if old == code:
+            return
+        self.cells[index] = code
+        self.passable[index] = self.walkable[code]
+        self.version += 1
+        for listener in self._listeners:
+            listener(index, old, code)
+
+    def subscribe(self, listener: Callable[[int, int, int], None]) -> None:
+        """
+        Register a callback that receives (index, old_code, new_code) for every change.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[int, int, int], None]) -> None:
+        self._listeners.remove(listener)
+
+    def neighbours(self, index: int) -> List[int]:
+        passable = self.passable
+        return [index + offset for offset in self.offsets if passable[index + offset]]
+
+    def find_all(self, code: int) -> Iterator[int]:
+        """
+        The index of every cell holding code, in order, found with bytes.find rather
+        than a cell at a time and without copying the cells whole.
+        """
+        cells, needle = self.cells, bytes([code])
+        if hasattr(cells, "find"):
+            index = cells.find(needle)
+            while index != -1:
+                yield index
+                index = cells.find(needle, index + 1)
+            return
+        for start in range(0, len(cells), BLOCK):
+            block = bytes(cells[start:start + BLOCK])
+            index = block.find(needle)
+            while index != -1:
+                yield start + index
+                index = block.find(needle, index + 1)
+
+    def row_codes(self, row: int) -> bytes:
+        """
+        The cell codes of a playable row without the border.
+        """
+        start = (row + 1) * self.stride + 1
+        return bytes(self.cells[start:start + self.cols])
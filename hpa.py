@@ -0,0 +1,254 @@
+"""
+Hierarchical pathfinding (HPA*) over a grid.Grid.
+
+The grid is cut into square clusters.  Where two neighbouring clusters share open
+border cells an entrance is made: one transition (or one at each end of a long
+opening) linking a cell on either side.  Within each cluster the shortest paths
+between its entrance cells are precomputed, giving a small abstract graph.
+
+A query connects start and goal to the entrances of their own clusters, searches
+the abstract graph and stitches the cached cluster paths back together.  The
+abstraction watches the grid and only the clusters around an edited cell are
+rebuilt before the next query.
+"""
+from collections import deque
+from heapq import heappush, heappop
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+LONG_ENTRANCE = 6  # openings at least this wide get a transition at each end
+
+Paths = Dict[int, List[int]]  # destination cell -> cells walked to get there
+
+
+class HierarchicalPathfinder:
+    def __init__(self, grid, cluster_size: int = 10) -> None:
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        clusters = self.cluster_rows * self.cluster_cols
+
+        self._borders: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}  # (cluster, cluster) -> transitions
+        self._nodes: List[Set[int]] = [set() for _ in range(clusters)]  # entrance cells per cluster
+        self._intra: List[Dict[int, Paths]] = [{} for _ in range(clusters)]  # cached paths inside a cluster
+        self._dirty: Set[int] = set()
+
+        for cluster in range(clusters):
+            self._build_borders(cluster)
+        for cluster in range(clusters):
+            self._build_nodes(cluster)
+            self._build_intra(cluster)
+        grid.subscribe(self.cell_changed)
+
+    def detach(self) -> None:
+        self.grid.unsubscribe(self.cell_changed)
+
+    # __ Clusters __
+
+    def cluster_of(self, index: int) -> int:
+        row, col = self.grid.location(index)
+        return (row // self.cluster_size) * self.cluster_cols + col // self.cluster_size
+
+    def _bounds(self, cluster: int) -> Tuple[int, int, int, int]:
+        row, col = divmod(cluster, self.cluster_cols)
+        top, left = row * self.cluster_size, col * self.cluster_size
+        bottom = min(top + self.cluster_size, self.grid.rows) - 1
+        right = min(left + self.cluster_size, self.grid.cols) - 1
+        return top, left, bottom, right
+
+    def _neighbour_clusters(self, cluster: int) -> List[int]:
+        row, col = divmod(cluster, self.cluster_cols)
+        neighbours = []
+        if row > 0:
+            neighbours.append(cluster - self.cluster_cols)
+        if row < self.cluster_rows - 1:
+            neighbours.append(cluster + self.cluster_cols)
+        if col > 0:
+            neighbours.append(cluster - 1)
+        if col < self.cluster_cols - 1:
+            neighbours.append(cluster + 1)
+        return neighbours
+
+    def _build_borders(self, cluster: int) -> None:
+        """
+        Find the transitions on the right and bottom border of the cluster.
+        """
+        grid = self.grid
+        passable = grid.passable
+        top, left, bottom, right = self._bounds(cluster)
+        row, col = divmod(cluster, self.cluster_cols)
+        if col < self.cluster_cols - 1:
+            cells = [grid.index(r, right) for r in range(top, bottom + 1)]
+            self._borders[cluster, cluster + 1] = self._transitions(passable, cells, 1)
+        if row < self.cluster_rows - 1:
+            cells = [grid.index(bottom, c) for c in range(left, right + 1)]
+            self._borders[cluster, cluster + self.cluster_cols] = self._transitions(passable, cells, grid.stride)
+
+    @staticmethod
+    def _transitions(passable, cells: List[int], across: int) -> List[Tuple[int, int]]:
+        transitions = []
+        run: List[int] = []
+        for cell in cells + [-1]:
+            if cell != -1 and passable[cell] and passable[cell + across]:
+                run.append(cell)
+                continue
+            if len(run) >= LONG_ENTRANCE:
+                transitions.extend([(run[0], run[0] + across), (run[-1], run[-1] + across)])
+            elif run:
+                middle = run[len(run) // 2]
+                transitions.append((middle, middle + across))
+            run = []
+        return transitions
+
+    def _build_nodes(self, cluster: int) -> None:
+        nodes = set()
+        for other in self._neighbour_clusters(cluster):
+            key = (cluster, other) if cluster < other else (other, cluster)
+            for a, b in self._borders[key]:
+                nodes.add(a if key[0] == cluster else b)
+        self._nodes[cluster] = nodes
+
+    def _local_paths(self, cluster: int, start: int, targets: Set[int]) -> Paths:
+        """
+        Breadth first search that stays inside the cluster, returns the paths to any targets reached.
+        """
+        grid = self.grid
+        passable = grid.passable
+        stride = grid.stride
+        top, left, bottom, right = self._bounds(cluster)
+        came_from: Dict[int, int] = {start: -1}
+        frontier: Deque[int] = deque([start])
+        found: Paths = {}
+        while frontier and len(found) < len(targets):
+            current = frontier.popleft()
+            if current in targets:
+                path = [current]
+                while came_from[path[-1]] != -1:
+                    path.append(came_from[path[-1]])
+                path.reverse()
+                found[current] = path
+            for offset in grid.offsets:
+                child = current + offset
+                if not passable[child] or child in came_from:
+                    continue
+                row, col = divmod(child, stride)
+                if top < row <= bottom + 1 and left < col <= right + 1:  # padded coordinates
+                    came_from[child] = current
+                    frontier.append(child)
+        return found
+
+    def _build_intra(self, cluster: int) -> None:
+        nodes = self._nodes[cluster]
+        self._intra[cluster] = {
+            node: {other: path for other, path in self._local_paths(cluster, node, nodes).items() if other != node}
+            for node in nodes
+        }
+
+    # __ Edits __
+
+    def cell_changed(self, index: int, old: int, new: int) -> None:
+        """
+        Grid listener: mark the cluster of any cell whose passability flipped.
+        """
+        walkable = self.grid.walkable
+        if walkable[old] != walkable[new]:
+            self._dirty.add(self.cluster_of(index))
+
+    def refresh(self) -> None:
+        """
+        Rebuild the dirty clusters and, as their entrances may have moved, the intra
+        cluster paths of their neighbours.
+        """
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        affected = set(dirty)
+        for cluster in dirty:
+            # the cluster owns its right/bottom borders, the neighbours own the left/top ones
+            self._build_borders(cluster)
+            row, col = divmod(cluster, self.cluster_cols)
+            if col > 0:
+                self._build_borders(cluster - 1)
+            if row > 0:
+                self._build_borders(cluster - self.cluster_cols)
+            affected.update(self._neighbour_clusters(cluster))
+        for cluster in affected:
+            self._build_nodes(cluster)
+            self._build_intra(cluster)
+
+    # __ Queries __
+
+    def _links(self, node: int, cluster: int) -> List[int]:
+        links = []
+        for other in self._neighbour_clusters(cluster):
+            key = (cluster, other) if cluster < other else (other, cluster)
+            for a, b in self._borders[key]:
+                if a == node:
+                    links.append(b)
+                elif b == node:
+                    links.append(a)
+        return links
+
+    def find_path(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        A path of cell indices from start to goal (like grid_astar) or None.  Paths
+        are near optimal: they are only as short as the entrances allow.
+        """
+        self.refresh()
+        passable = self.grid.passable
+        if not passable[start] or not passable[goal]:
+            return None
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        if start_cluster == goal_cluster:
+            local = self._local_paths(start_cluster, start, {goal})
+            if goal in local:
+                return local[goal]
+
+        # temporary edges joining start and goal to their cluster entrances
+        start_edges = self._local_paths(start_cluster, start, self._nodes[start_cluster])
+        goal_edges = self._local_paths(goal_cluster, goal, self._nodes[goal_cluster])
+
+        stride = self.grid.stride
+        goal_row, goal_col = divmod(goal, stride)
+
+        def estimate(cell: int) -> int:
+            row, col = divmod(cell, stride)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        came_from: Dict[int, Tuple[int, List[int]]] = {start: (-1, [start])}
+        explored: Dict[int, int] = {start: 0}
+        frontier: List = [(estimate(start), 0, start)]
+        while frontier:
+            _, cost, current = heappop(frontier)
+            cost = -cost
+            if current == goal:
+                break
+            if cost > explored[current]:
+                continue
+            cluster = self.cluster_of(current)
+            edges: List[Tuple[int, List[int]]] = []
+            if current == start:
+                edges.extend(start_edges.items())
+            edges.extend(self._intra[cluster].get(current, {}).items())
+            edges.extend((other, [current, other]) for other in self._links(current, cluster))
+            if current in goal_edges:
+                edges.append((goal, goal_edges[current][::-1]))
+            for child, path in edges:
+                new_cost = cost + len(path) - 1
+                if new_cost < explored.get(child, new_cost + 1):
+                    explored[child] = new_cost
+                    came_from[child] = (current, path)
+                    heappush(frontier, (new_cost + estimate(child), -new_cost, child))
+        else:
+            return None
+
+        # refine: stitch the cached cluster paths together
+        pieces: List[List[int]] = []
+        current = goal
+        while current != start:
+            current, path = came_from[current]
+            pieces.append(path)
+        cells = [start]
+        for path in reversed(pieces):
+            cells.extend(path[1:])
+        return cells
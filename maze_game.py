@@ -1,9 +1,22 @@
 import enum
+import math
 import random
-from typing import NamedTuple, Callable, List
+from typing import NamedTuple, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import pygame
+import batch_solver
+import mazefile
 import pathfinding
+from connectivity import Components
+from flowfield import FlowField
+from freecells import FreeCells
+from grid import Grid
+from hpa import HierarchicalPathfinder
+from pathcache import PathCache
+from pool import EntityPool, ObjectPool
+from profiler import DISABLED, Profiler
+from render import DirtyRenderer, TileBatch, grid_background
+from spatial import SpatialHash
 
 # __ Building Blocks __
 
@@ -21,6 +34,25 @@ class Colour(tuple, enum.Enum):
     BULLET = (0, 0, 255)
 
 
+# Compact cell codes used by the array-backed Grid (and anything else that wants
+# a byte per cell instead of a Colour).
+CELL_CODE = {colour: code for code, colour in enumerate(Colour)}
+CELL_COLOUR = list(Colour)
+
+# Cost of stepping into a cell, anything not listed costs 1.  BLOCKED cells are never entered.
+TERRAIN_COST = {
+    Colour.SNACK: 2.0,
+    Colour.WALL: 5.0,
+    Colour.TOWER: 10.0,
+}
+
+
+TOWER_RANGE = 5  # how far (in cells) a tower looks for a zombie to shoot at
+BULLET_SPEED = 0.5  # cells per tick
+BULLET_RADIUS = 0.5  # how close a bullet has to get to hit
+ZOMBIE_HEALTH = 3  # hits a zombie takes
+
+
 class Location(NamedTuple):
     row: int
     col: int
@@ -42,6 +74,13 @@ class Cube:
         self.color = color
         # self.rows = rows
 
+    def rect(self) -> Tuple[int, int, int, int]:
+        """
+        The screen area of the whole cell the cube sits in (including its border).
+        """
+        length = self.width // self.rows
+        return int(self.pos.row * length), int(self.pos.col * length), length, length
+
     def draw(self, surface):
         length = self.width // self.rows
         # length = 10
@@ -54,23 +93,48 @@ class Cube:
 
 
 class Tower(Cube):
-    def __init__(self, pos, color):
+    def __init__(self, pos, color, pool: Optional["Bullets"] = None):
         super(Cube, self).__init__()
         self.pos = pos
         self.color = color
-        self.bullets = []
+        self.pool = pool if pool is not None else Bullets(1)  # where the bullets live
+        self.bullets: List[int] = []  # slots in the pool
 
-    def shoot(self, surface):
-        # Scan 5 spaced away for target
-        # if found start shooting at target
-        if len(self.bullets) == 0:
-            bullet = Bullet(self.pos, Colour.BULLET)
-            self.bullets.append(bullet)
+    def shoot(self, surface=None, space: Optional[SpatialHash] = None) -> List["Zombie"]:
+        """
+        Keep a bullet in flight; with a spatial index it is aimed at the nearest zombie
+        within TOWER_RANGE and checked for hits.
 
-        for bullet in self.bullets:
-            bullet.move(surface)
-            if bullet.life == 0:
-                self.bullets.remove(bullet)
+        :return: The zombies hit this tick.
+        """
+        pool = self.pool
+        # a tower's pos is (x, y) on screen, the index works in (row, col)
+        row, col = self.pos.col, self.pos.row
+        if len(self.bullets) == 0:
+            dx = dy = BULLET_SPEED  # nothing to aim at, just drift
+            target = None if space is None else space.nearest(row, col, TOWER_RANGE, Zombie)
+            if target is not None:
+                target_row, target_col = space.position(target)
+                distance = math.hypot(target_row - row, target_col - col)
+                if distance:
+                    dx = BULLET_SPEED * (target_col - col) / distance
+                    dy = BULLET_SPEED * (target_row - row) / distance
+            self.bullets.append(pool.fire(self.pos.row, self.pos.col, dx, dy))
+
+        hits = []
+        # backwards so a spent bullet can be dropped without skipping the next one
+        for i in range(len(self.bullets) - 1, -1, -1):
+            slot = self.bullets[i]
+            pool.move(slot, surface)
+            if space is not None:
+                hit = space.nearest(pool.y[slot], pool.x[slot], BULLET_RADIUS, Zombie)
+                if hit is not None:
+                    hits.append(hit)
+                    pool.life[slot] = 0
+            if pool.life[slot] <= 0:
+                pool.release(slot)
+                del self.bullets[i]
+        return hits
 
     def draw(self, surface):
 
@@ -106,6 +170,7 @@ class Zombie(Cube):
         super(Cube, self).__init__()
         self.pos = pos
         self.color = color
+        self.health = ZOMBIE_HEALTH
 
     def draw(self, surface):
         length = self.width // self.rows
@@ -116,23 +181,146 @@ class Zombie(Cube):
         )
 
 
+class LazyCells:
+    """
+    Stands in for Maze.cells on a maze loaded from a file: cells[row][col] only makes
+    the Cube the first time it is asked for (to draw it, say), from the grid's cell code.
+    """
+
+    def __init__(self, grid: Grid) -> None:
+        self.grid = grid
+        self.made: Dict[int, Cube] = {}  # grid index -> the cube for that cell
+
+    def __len__(self) -> int:
+        return self.grid.rows
+
+    def __getitem__(self, row: int) -> "LazyRow":
+        if not 0 <= row < self.grid.rows:
+            raise IndexError(f"row {row} is outside of the maze")
+        return LazyRow(self, row)
+
+    def __iter__(self) -> Iterator["LazyRow"]:
+        for row in range(self.grid.rows):
+            yield LazyRow(self, row)
+
+    def cube(self, row: int, col: int) -> Cube:
+        index = self.grid.index(row, col)
+        cube = self.made.get(index)
+        if cube is None:
+            cube = self.made[index] = Cube(Location(col, row), CELL_COLOUR[self.grid.cells[index]])
+        return cube
+
+
+class LazyRow:
+    def __init__(self, cells: LazyCells, row: int) -> None:
+        self.cells = cells
+        self.row = row
+
+    def __len__(self) -> int:
+        return self.cells.grid.cols
+
+    def _check(self, col: int) -> None:
+        if not 0 <= col < self.cells.grid.cols:
+            raise IndexError(f"column {col} is outside of the maze")
+
+    def __getitem__(self, col: int) -> Cube:
+        self._check(col)
+        return self.cells.cube(self.row, col)
+
+    def __setitem__(self, col: int, cube: Cube) -> None:
+        self._check(col)
+        self.cells.made[self.cells.grid.index(self.row, col)] = cube
+
+    def __iter__(self) -> Iterator[Cube]:
+        for col in range(self.cells.grid.cols):
+            yield self.cells.cube(self.row, col)
+
+
 class Maze:
-    def __init__(self, size, cell_size):
+    def __init__(self, size, cell_size, grid: Optional[Grid] = None, rng: Optional[random.Random] = None):
+        """
+
+        :param size: (width, height) of the board in pixels.
+        :param cell_size: Size of a cell in pixels.
+        :param grid: The cells of a maze made elsewhere (see Maze.load), a random maze is made when not given.
+        :param rng: Where the random maze and spawns come from, the random module when not given.
+        """
         self.size = size
+        self.rng = rng if rng is not None else random
         self.cell_size = cell_size
         self.rows, self.cols = self._get_rows_and_cols()
         self.start = Location(0, 0)
         self.goal = Location(10, 10)
         self.zombies = []
-        self.cells = self._randomly_fill()
+        self.towers = []
+        self.space = SpatialHash()  # zombies and towers by (row, col) for targeting and hits
+        self._sprite_rects: List[Tuple[int, int, int, int]] = []  # where zombies and bullets were last drawn
+        self.bullets = Bullets()
+        self.zombie_pool: ObjectPool[Zombie] = ObjectPool(lambda: Zombie(self.start, Colour.ZOMBIE), 16)
+        self.costs = [TERRAIN_COST.get(colour, 1.0) for colour in Colour]
+        if grid is None:
+            self.grid = Grid(self.rows, self.cols, blocked=(CELL_CODE[Colour.BLOCKED],))
+            self.cells = self._randomly_fill()
+        else:
+            self.grid = grid
+            self.cells = LazyCells(grid)
+            self._adopt_towers()
+
+        # grid indices of the cells that changed since the last render
+        self._dirty: Set[int] = set()
+        self.grid.subscribe(lambda index, old, new: self._dirty.add(index))
+
+        self._free: Optional[FreeCells[int]] = None
+        self._zombie_cells: Dict[int, int] = {}  # grid index -> zombies standing there
+        self.grid.subscribe(self._track_free)
+        self._connectivity: Optional[Components] = None
+
+    @classmethod
+    def load(cls, path: str, cell_size: int = 10) -> "Maze":
+        """
+        Open a maze saved with Maze.save.  The cell codes go straight into the grid;
+        a Cube is only made for a cell when it is drawn or changed.
+        """
+        grid, start, goal = mazefile.load(path, blocked=(CELL_CODE[Colour.BLOCKED],))
+        maze = cls((grid.cols * cell_size, grid.rows * cell_size), cell_size, grid)
+        maze.start = Location(*start)
+        maze.goal = Location(*goal)
+        return maze
+
+    def save(self, path: str, rle: bool = False) -> None:
+        """
+        Write the maze to path in the mazefile format, see mazefile.save for rle.
+        """
+        mazefile.save(path, self.grid, self.start, self.goal, rle)
+
+    def _adopt_towers(self) -> None:
+        # the towers of a loaded maze have to shoot, so they are made up front
+        grid = self.grid
+        for index in grid.find_all(CELL_CODE[Colour.TOWER]):
+            row, col = grid.location(index)
+            self.cells[row][col] = cube = Tower(Location(col, row), Colour.TOWER, self.bullets)
+            self.towers.append(cube)
+            self.space.insert(cube, row, col)
+
+    @property
+    def free(self) -> FreeCells[int]:
+        """
+        Grid indices of the EMPTY cells no zombie stands on, for O(1) random spawning;
+        only worked out the first time it is needed, as a big maze has a lot of them.
+        """
+        if self._free is None:
+            empty = CELL_CODE[Colour.EMPTY]
+            cells, occupied = self.grid.cells, self._zombie_cells
+            self._free = FreeCells(i for i in range(len(cells)) if cells[i] == empty and i not in occupied)
+        return self._free
 
     def _randomly_fill(self, sparseness: float = 0.3) -> list:
         grid = [[Cube(Location(c, r), color=Colour.EMPTY) for c in range(self.cols)] for r in range(self.rows)]
 
         for row in range(self.rows):
             for col in range(self.cols):
-                if random.uniform(0, 1.0) < sparseness:
-                    if random.randint(0, 5) == 5:
+                if self.rng.uniform(0, 1.0) < sparseness:
+                    if self.rng.randint(0, 5) == 5:
                         grid[row][col].color = Colour.SNACK
                     else:
                         grid[row][col].color = Colour.BLOCKED
@@ -142,8 +330,126 @@ class Maze:
         grid[self.start.row][self.start.col].color = Colour.START
         grid[self.goal.row][self.goal.col].color = Colour.GOAL
 
+        # keep the array-backed grid in sync with the Cube cells
+        for row in range(self.rows):
+            for col in range(self.cols):
+                self.grid.set(row, col, CELL_CODE[grid[row][col].color])
+
         return grid
 
+    @property
+    def connectivity(self) -> Components:
+        """
+        Connected-component labels of the maze, kept up to date as cells change; only
+        worked out the first time it is needed.
+        """
+        if self._connectivity is None:
+            self._connectivity = Components(self.grid)
+        return self._connectivity
+
+    def reachable(self, start: Location, goal: Location) -> bool:
+        """
+        Whether there is any path from start to goal, in constant time and without a search.
+        """
+        grid = self.grid
+        return self.connectivity.reachable(grid.index(start.row, start.col), grid.index(goal.row, goal.col))
+
+    def seals_goal(self, cells: Iterable[Location], source: Location) -> bool:
+        """
+        Whether walling off cells would leave source no way to the goal.  Towers and
+        walls can be walked through, but the zombie blocks whatever it bumps into, so
+        they count as blocked here.
+        """
+        grid = self.grid
+        indices = [grid.index(loc.row, loc.col) for loc in cells]
+        return self.connectivity.would_disconnect(
+            indices, grid.index(source.row, source.col), grid.index(self.goal.row, self.goal.col)
+        )
+
+    def _track_free(self, index: int, old: int, new: int) -> None:
+        if self._free is None:
+            return
+        if new == CELL_CODE[Colour.EMPTY]:
+            if index not in self._zombie_cells:
+                self.free.add(index)
+        elif old == CELL_CODE[Colour.EMPTY]:
+            self.free.discard(index)
+
+    def _occupy(self, loc: Location) -> None:
+        index = self.grid.index(loc.row, loc.col)
+        self._zombie_cells[index] = self._zombie_cells.get(index, 0) + 1
+        if self._free is not None:
+            self._free.discard(index)
+
+    def _vacate(self, loc: Location) -> None:
+        index = self.grid.index(loc.row, loc.col)
+        count = self._zombie_cells[index] - 1
+        if count:
+            self._zombie_cells[index] = count
+            return
+        del self._zombie_cells[index]
+        if self._free is not None and self.grid.cells[index] == CELL_CODE[Colour.EMPTY]:
+            self._free.add(index)
+
+    def random_empty(self, rng: Optional[random.Random] = None) -> Location:
+        """
+        A uniformly random EMPTY cell in constant time, however full the maze is.
+        """
+        return Location(*self.grid.location(self.free.sample(rng or self.rng)))
+
+    def spawn_snack(self, rng: Optional[random.Random] = None) -> Location:
+        loc = self.random_empty(rng)
+        self.paint(loc, Colour.SNACK)
+        return loc
+
+    def spawn_zombie(self, rng: Optional[random.Random] = None) -> Zombie:
+        return self.new_zombie(self.random_empty(rng))
+
+    def new_zombie(self, loc: Location) -> Zombie:
+        """
+        A zombie at loc, recycled from the pool when one has been killed before.
+        """
+        zombie = self.zombie_pool.acquire()
+        zombie.pos = loc
+        zombie.health = ZOMBIE_HEALTH
+        self.add_zombie(zombie)
+        return zombie
+
+    def add_zombie(self, zombie: Zombie) -> None:
+        self.zombies.append(zombie)
+        self.space.insert(zombie, zombie.pos.row, zombie.pos.col)
+        self._occupy(zombie.pos)
+
+    def move_zombie(self, zombie: Zombie, loc: Location) -> None:
+        if zombie in self.space:
+            self.space.move(zombie, loc.row, loc.col)
+            # the zombie is only in the free index while it is alive
+            self._vacate(zombie.pos)
+            self._occupy(loc)
+        zombie.pos = loc
+
+    def kill_zombie(self, zombie: Zombie) -> None:
+        self.zombies.remove(zombie)
+        self.space.remove(zombie)
+        self._vacate(zombie.pos)
+        self.zombie_pool.release(zombie)
+
+    def fire(self, surface=None) -> None:
+        """
+        Every tower shoots at the zombies in range; zombies out of health are removed.
+        """
+        for tower in self.towers:
+            for zombie in tower.shoot(surface, self.space):
+                zombie.health -= 1
+                if zombie.health <= 0 and zombie in self.space:
+                    self.kill_zombie(zombie)
+
+    def frame_allocations(self) -> int:
+        """
+        Bullet slots and zombies created since the last call, 0 in a steady state.
+        """
+        return self.bullets.frame() + self.zombie_pool.frame()
+
     def _get_rows_and_cols(self):
         rows, cols = self.size
         rows = rows // self.cell_size
@@ -172,79 +478,268 @@ class Maze:
             for c in r:
                 c.draw(surface)
 
+    def tiles(self, background) -> TileBatch:
+        """
+        A batch renderer that draws every cell straight from the grid's cell codes.
+        """
+        return TileBatch(self.grid, CELL_COLOUR, self.cell_size, background)
+
+    def zombie_rect(self, zombie: Zombie) -> Tuple[int, int, int, int]:
+        """
+        Where a zombie is drawn; unlike a Cube's, a zombie's pos is (row, col).
+        """
+        length = self.cell_size
+        return zombie.pos.col * length + 1, zombie.pos.row * length + 1, length - 2, length - 2
+
+    def draw_tiles(self, surface, tiles: TileBatch) -> None:
+        """
+        Batch version of draw_cells: all cells in one blit, only zombies and bullets are
+        drawn one by one.
+        """
+        tiles.draw(surface)
+        for zombie in self.zombies:
+            pygame.draw.rect(surface, zombie.color, self.zombie_rect(zombie))
+        for slot in self.bullets:
+            self.bullets.draw(slot, surface)
+
+    def render(self, renderer: DirtyRenderer) -> None:
+        """
+        Redraw only the cells that changed since the last frame, the zombies and the
+        bullets in flight.
+        """
+        surface = renderer.surface
+        grid = self.grid
+        length = self.cell_size
+
+        # the cells under last frame's zombies and bullets have to be redrawn once they move on
+        for x, y, width, height in self._sprite_rects:
+            renderer.restore((x, y, width, height))
+            for row in range(max(y // length, 0), min((y + height - 1) // length + 1, self.rows)):
+                for col in range(max(x // length, 0), min((x + width - 1) // length + 1, self.cols)):
+                    self._dirty.add(grid.index(row, col))
+
+        dirty, self._dirty = self._dirty, set()
+        for index in dirty:
+            row, col = grid.location(index)
+            cube = self.cells[row][col]
+            renderer.restore(cube.rect())
+            Cube.draw(cube, surface)  # just the square, bullets are drawn below
+
+        # everything drawn is remembered, so a bullet that is spent or a zombie that
+        # is killed before the next frame still has its square restored then
+        self._sprite_rects = []
+        for zombie in self.zombies:
+            rect = self.zombie_rect(zombie)
+            pygame.draw.rect(surface, zombie.color, rect)
+            self._sprite_rects.append(rect)
+            renderer.mark(rect)
+        for slot in self.bullets:
+            self.bullets.draw(slot, surface)
+            rect = self.bullets.rect(slot)
+            self._sprite_rects.append(rect)
+            renderer.mark(rect)
+
+    def paint(self, loc: Location, colour: Colour) -> None:
+        """
+        Change the colour of a cell, keeping the Cube and the grid in sync.
+        """
+        self.cells[loc.row][loc.col].color = colour
+        self.grid.set(loc.row, loc.col, CELL_CODE[colour])
+
+    def _place(self, row: int, col: int, cube: Cube) -> None:
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise IndexError(f"({row}, {col}) is outside of the maze")
+        old = self.cells[row][col]
+        if old in self.towers:
+            self.towers.remove(old)
+            self.space.remove(old)
+            for slot in old.bullets:
+                old.pool.release(slot)
+            old.bullets.clear()
+        self.cells[row][col] = cube
+        if isinstance(cube, Tower) and cube.color == Colour.TOWER:
+            self.towers.append(cube)
+            self.space.insert(cube, row, col)
+        self.grid.set(row, col, CELL_CODE[cube.color])
+
     def _process_click_point(self, x, y):
         x = x // self.cell_size  # gives the correct bucket for extremes -- but not middle
         y = y // self.cell_size
 
         return x, y
 
-    def click_create_wall(self, x, y) -> None:
+    def click_create_wall(self, x, y) -> bool:
         x, y = self._process_click_point(x, y)
 
         # note the x, y is reversed -- its a bug need to revisit.
-        self.cells[y][x].color = Colour.WALL
+        return self.create_wall(Location(y, x), protect=self.start)
 
-    def click_create_tower(self, x, y) -> None:
+    def click_create_tower(self, x, y) -> bool:
         x, y = self._process_click_point(x, y)
+        return self.create_tower(Location(y, x), protect=self.start)
+
+    def create_wall(self, loc: Location, protect: Optional[Location] = None) -> bool:
+        """
+
+        :param protect: Refuse the wall if it would cut this cell off from the goal.
+        :return: False when the wall was refused.
+        """
+        if protect is not None and self.seals_goal([loc], protect):
+            return False
+        self.paint(loc, Colour.WALL)
+        return True
+
+    def tower_cells(self, loc: Location) -> List[Location]:
+        """
+        The cells of the maze a tower centred on loc would cover.
+        """
+        cells = [loc] + [Location(loc.row + dr, loc.col + dc) for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))]
+        return [cell for cell in cells if 0 <= cell.row < self.rows and 0 <= cell.col < self.cols]
+
+    def create_tower(self, loc: Location, protect: Optional[Location] = None) -> bool:
+        """
+        A tower centred on loc with walls on each side.
+
+        :param protect: Refuse the tower if it would cut this cell off from the goal.
+        :return: False when the tower was refused.
+        """
+        if protect is not None and self.seals_goal(self.tower_cells(loc), protect):
+            return False
+        x, y = loc.col, loc.row
         try:
             for i in range(2):
                 c = Colour.TOWER if i == 0 else Colour.WALL
-                self.cells[y-i][x] = Tower(Location(x, y-i), c)
-                self.cells[y+i][x] = Tower(Location(x, y+i), c)
-                self.cells[y][x-i] = Tower(Location(x-i, y), c)
-                self.cells[y][x+i] = Tower(Location(x+i, y), c)
+                self._place(y-i, x, Tower(Location(x, y-i), c, self.bullets))
+                self._place(y+i, x, Tower(Location(x, y+i), c, self.bullets))
+                self._place(y, x-i, Tower(Location(x-i, y), c, self.bullets))
+                self._place(y, x+i, Tower(Location(x+i, y), c, self.bullets))
         except Exception:
             pass
+        return True
 
     def goal_test(self, location: Location) -> bool:
         return location == self.goal
 
     def successors(self, loc: Location) -> List[Location]:
-        successors: List[Location] = []
-        # Test UP
-        if loc.row - 1 >= 0 and self.cells[loc.row-1][loc.col].color != Colour.BLOCKED:
-            successors.append(Location(loc.row-1, loc.col))
+        grid = self.grid
+        return [Location(*grid.location(i)) for i in grid.neighbours(grid.index(loc.row, loc.col))]
+
+    def cost(self, _: Location, loc: Location) -> float:
+        """
+        Cost callback for pathfinding.astar/dijkstra: the terrain cost of the cell stepped into.
+        """
+        return TERRAIN_COST.get(self.cells[loc.row][loc.col].color, 1.0)
+
+    def solve(
+        self,
+        start: Location,
+        goal: Location,
+        weighted: bool = False,
+        stats: Optional[pathfinding.SearchStats] = None,
+    ) -> List[Location]:
+        """
+        Grid specialised A* from start to goal; an empty list when there is no path.
+
+        :param weighted: Use the TERRAIN_COST of each cell rather than a cost of 1 per step.
+        :param stats: Collects the search counters when given.
+        """
+        grid = self.grid
+        costs = self.costs if weighted else None
+        path = pathfinding.grid_astar(grid, grid.index(start.row, start.col), grid.index(goal.row, goal.col), costs, stats)
+        return self.to_locations(path)
+
+    def solve_many(
+        self, pairs: Iterable[Tuple[Location, Location]], processes: Optional[int] = None
+    ) -> List[List[Location]]:
+        """
+        Solve many (start, goal) queries in parallel worker processes, results in the same order.
+        """
+        grid = self.grid
+        indices = [(grid.index(*start), grid.index(*goal)) for start, goal in pairs]
+        return [self.to_locations(path) for path in batch_solver.solve_many(grid, indices, processes)]
+
+    def planner(self, start: Location, goal: Location) -> pathfinding.DStarLite:
+        """
+        An incremental planner that repairs its path as cells of this maze change.
+        """
+        grid = self.grid
+        return pathfinding.DStarLite(grid, grid.index(start.row, start.col), grid.index(goal.row, goal.col))
+
+    def hierarchy(self, cluster_size: int = 10) -> HierarchicalPathfinder:
+        """
+        A clustered abstraction of the maze for fast queries on big boards; walls and
+        towers only rebuild the clusters around them.
+        """
+        return HierarchicalPathfinder(self.grid, cluster_size)
+
+    def path_cache(self, capacity: int = 256, search=pathfinding.grid_astar) -> PathCache:
+        """
+        An LRU cache of paths on this maze that only forgets the paths an edit affects.
 
-        # Test DOWN
-        if loc.row + 1 < self.rows and self.cells[loc.row+1][loc.col].color != Colour.BLOCKED:
-            successors.append(Location(loc.row+1, loc.col))
+        :param search: Run on a miss as search(grid, start, goal), see PathCache.
+        """
+        return PathCache(self.grid, capacity, search)
 
-        # Test LEFT
-        if loc.col - 1 >= 0 and self.cells[loc.row][loc.col-1].color != Colour.BLOCKED:
-            successors.append(Location(loc.row, loc.col-1))
+    def flow_field(self, goal: Location) -> FlowField:
+        """
+        A distance map towards goal shared by every zombie, kept up to date as cells change.
+        """
+        return FlowField(self.grid, self.grid.index(goal.row, goal.col))
 
-        # Test RIGHT
-        if loc.col + 1 < self.cols:
-            if self.cells[loc.row][loc.col+1].color != Colour.BLOCKED:
-                successors.append(Location(loc.row, loc.col+1))
+    def move_zombies(self, field: FlowField, zombies: Optional[Iterable[Zombie]] = None) -> None:
+        """
+        Step every zombie (or just those given) one cell along the flow field; stuck
+        zombies stay put.
+        """
+        grid = self.grid
+        for zombie in self.zombies if zombies is None else zombies:
+            step = field.next_step(grid.index(zombie.pos.row, zombie.pos.col))
+            if step is not None:
+                self.move_zombie(zombie, Location(*grid.location(step)))
 
-        return successors
+    def to_locations(self, path: Optional[List[int]]) -> List[Location]:
+        if path is None:
+            return []
+        return [Location(*self.grid.location(i)) for i in path]
 
 # __ Gameplay __
 
 
-class Bullet(Cube):
-    def __init__(self, pos, color):
-        super(Cube, self).__init__()
-        self.pos = pos
-        self.color = color
-        self.life = 10
+class Bullets(EntityPool):
+    """
+    Every bullet in flight, stored field by field so moving them allocates nothing.
+    x and y are the same way round as a Cube's pos, dx and dy are per tick.
+    """
 
-    def draw(self, surface):
-        length = self.width // self.rows
+    color = Colour.BULLET
+
+    def __init__(self, capacity: int = 64) -> None:
+        super().__init__(("x", "y", "dx", "dy", "life"), capacity)
+
+    def fire(self, x: float, y: float, dx: float, dy: float, life: int = 10) -> int:
+        return self.spawn(x, y, dx, dy, life)
+
+    def rect(self, slot: int) -> Tuple[int, int, int, int]:
+        length = Cube.width // Cube.rows
+        return int(self.x[slot] * length), int(self.y[slot] * length), length, length
+
+    def draw(self, slot: int, surface) -> None:
+        length = Cube.width // Cube.rows
         pygame.draw.rect(
             surface,
             self.color,
-            (self.pos.row * length + 1,
-             self.pos.col * length + 1,
+            (self.x[slot] * length + 1,
+             self.y[slot] * length + 1,
              length - 2,
              length - 2),
         )
 
-    def move(self, surface):
-        self.life -= 1
-        self.pos = Location(self.pos.row + 0.5, self.pos.col + 0.5)
-        self.draw(surface)
+    def move(self, slot: int, surface=None) -> None:
+        self.life[slot] -= 1
+        self.x[slot] += self.dx[slot]
+        self.y[slot] += self.dy[slot]
+        if surface is not None:
+            self.draw(slot, surface)
 
 
 def manhattan_distance(goal: Location) -> Callable[[Location], float]:
@@ -256,7 +751,154 @@ def manhattan_distance(goal: Location) -> Callable[[Location], float]:
     return distance
 
 
-def main():
+class MazeState(NamedTuple):
+    tick: int
+    zombie: Optional[Location]
+    reached_goal: bool
+    stuck: bool  # the goal can no longer be reached
+    killed: bool  # the towers shot the zombie down
+    allocations: int = 0  # pooled entities created this tick, 0 in a steady state
+
+    @property
+    def done(self) -> bool:
+        return self.reached_goal or self.stuck or self.killed
+
+
+class MazeEngine:
+    """
+    The maze game without pygame's events, clock or display: every call to `step`
+    applies the player's actions, advances the zombie by one fixed tick and returns
+    the new state.  Rendering (or anything else) can watch by adding a callable to
+    `observers`.
+    """
+
+    def __init__(
+            self,
+            size=(500, 500),
+            cell_size=10,
+            seed: Optional[int] = None,
+            profiler: Profiler = DISABLED,
+            maze: Optional[Maze] = None,
+            horde: int = 0,
+    ):
+        """
+
+        :param seed: Makes the same game every time when given, without touching the random module.
+        :param maze: Play this maze (from generators.generate or Maze.load, say) instead of a random one.
+        :param horde: Extra zombies spawned on random empty cells; rather than planning
+            a path each, they all follow one flow field to the goal.
+        """
+        self.rng = random.Random(seed)
+        self.maze = maze if maze is not None else Maze(size, cell_size, rng=self.rng)
+        self.zombie = self.maze.new_zombie(self.maze.start)
+        self.profiler = profiler
+        self.stats = pathfinding.SearchStats()  # every plan and replan of the zombie's path
+        self.replans = 0
+
+        # the planner watches the maze so towers and blocked cells are repaired
+        # incrementally instead of searching from scratch
+        self.planner = self.maze.planner(self.maze.start, self.maze.goal)
+        # replans go through a cache in front of the planner, so coming back to a cell
+        # it has already planned from (with nothing in the way changed) costs nothing
+        self.paths = self.maze.path_cache(search=self._plan)
+        self.path: List[Location] = []
+        if self.maze.reachable(self.maze.start, self.maze.goal):
+            self.path = self.maze.to_locations(self.planner.plan(self.stats))
+        self.current: Optional[Location] = None
+        self.tick = 0
+        self.reached_goal = False
+        self.stuck = not self.path
+        self.allocations = 0
+        self.rejected = 0  # towers refused because they would have sealed the goal off
+
+        # one distance map, kept up to date as towers go up, steers the whole horde
+        self.field: Optional[FlowField] = self.maze.flow_field(self.maze.goal) if horde else None
+        self.horde: List[Zombie] = [self.maze.spawn_zombie(self.rng) for _ in range(horde)]
+        self.observers: List[Callable[["MazeEngine", MazeState], None]] = []
+
+    def state(self) -> MazeState:
+        killed = self.zombie not in self.maze.space
+        return MazeState(self.tick, self.current, self.reached_goal, self.stuck, killed, self.allocations)
+
+    def step(self, actions: Iterable[Location] = ()) -> MazeState:
+        """
+
+        :param actions: Cells to centre new towers on before the zombie moves; a tower
+            that would seal the zombie off from the goal is refused.
+        """
+        maze = self.maze
+        for loc in actions:
+            if not maze.create_tower(loc, protect=self.zombie.pos):
+                self.rejected += 1
+
+        if not self.state().done:
+            self.tick += 1
+            self._advance()
+            if self.current is not None:
+                maze.move_zombie(self.zombie, self.current)
+            if self.horde:
+                with self.profiler.scope("horde"):
+                    maze.move_zombies(self.field, self.horde)
+            with self.profiler.scope("shoot"):
+                maze.fire()
+            if self.horde:
+                self.horde = [zombie for zombie in self.horde if zombie in maze.space]
+        self.allocations = maze.frame_allocations()
+
+        state = self.state()
+        for observer in self.observers:
+            observer(self, state)
+        return state
+
+    def _advance(self) -> None:
+        maze = self.maze
+        _temp = self.current
+        if _temp is not None and maze.cells[_temp.row][_temp.col].color != Colour.BLOCKED:
+            maze.paint(_temp, Colour.EMPTY)
+
+        current = self.current = self.path.pop(0)
+        if current == maze.goal:
+            self.reached_goal = True
+            return
+
+        if maze.cells[current.row][current.col].color == Colour.EMPTY:
+            maze.paint(current, Colour.ZOMBIE)
+
+        elif maze.cells[current.row][current.col].color != Colour.EMPTY:
+            # need to invalidate the cache and start again
+            source = current
+            if _temp is not None:
+                # maze.cells[_temp.row][_temp.col].color = Colour.PATH
+                maze.paint(current, Colour.BLOCKED)
+                source = _temp
+            grid = maze.grid
+            self.planner.move_to(grid.index(source.row, source.col))
+            if maze.reachable(source, maze.goal):
+                expanded = self.stats.expanded
+                with self.profiler.scope("plan"):
+                    path = self.paths.find_path(grid.index(source.row, source.col), self.planner.goal)
+                    self.path = maze.to_locations(path)
+                self.replans += 1
+                self.profiler.count("replans")
+                self.profiler.count("expanded", self.stats.expanded - expanded)
+            else:
+                self.path = []  # known without a search that would have to exhaust the maze
+            self.stuck = not self.path
+
+    def _plan(self, grid, start: int, goal: int) -> Optional[List[int]]:
+        # the path cache's search on a miss, the planner has already been moved to start
+        return self.planner.plan(self.stats)
+
+
+def main(batch: bool = False, profile: bool = False, trace: Optional[str] = None, horde: int = 0):
+    """
+
+    :param batch: Draw the whole board from the grid every frame (TileBatch) instead of
+        redrawing only the cells that changed.
+    :param profile: Show rolling p50/p99 frame and phase times over the board.
+    :param trace: Write every frame's timings and search counters to this .csv or .json file on exit.
+    :param horde: Extra zombies that follow a shared flow field to the goal, see MazeEngine.
+    """
     tick_time = 10
     size = (500, 500)  # can't change this yet without creating an issue with the board scale
     cell_size = 10
@@ -265,68 +907,81 @@ def main():
 
     # instantiate the rendering object (surface), BG colour, and title
     screen = pygame.display.set_mode(size)
-    screen.fill(background_colour)
     pygame.display.set_caption("Maze Game")
     clock = pygame.time.Clock()
 
-    # Create Maze
-    maze = Maze(size, cell_size)
-
-    distance = manhattan_distance(maze.goal)
+    profiler = Profiler(trace=trace is not None) if profile or trace else DISABLED
+    font = None
+    if profile:
+        pygame.font.init()
+        font = pygame.font.SysFont("monospace", 11)
+
+    # Create the game, the screen just watches it
+    engine = MazeEngine(size, cell_size, profiler=profiler, horde=horde)
+    maze = engine.maze
+
+    # the grid lines never change so they are drawn once to a cached background;
+    # after the first frame only changed cells are redrawn and sent to the display
+    profiler.begin_frame()
+    with profiler.scope("grid"):
+        background = grid_background(size, background_colour, maze.draw_grid)
+    renderer = DirtyRenderer(screen, background)
+    tiles = maze.tiles(background) if batch else None
+    with profiler.scope("draw"):
+        maze.draw_cells(screen)
+    profiler.end_frame()
 
-    maze.zombies.append(Zombie(maze.start, Colour.ZOMBIE))
+    def draw(game: MazeEngine, _: MazeState) -> None:
+        with profiler.scope("draw"):
+            if tiles is not None:
+                game.maze.draw_tiles(screen, tiles)
+            else:
+                game.maze.render(renderer)
+        if font is not None:
+            # opaque, so whatever was drawn under it last frame is covered again
+            renderer.mark(profiler.draw(screen, font))
+        with profiler.scope("update"):
+            if tiles is not None:
+                pygame.display.update()
+            else:
+                renderer.update()
 
-    solution = pathfinding.astar(maze.start, maze.goal_test, maze.successors, distance)
-    cached_path = pathfinding.node_to_path(solution) if solution is not None else []
+    engine.observers.append(draw)
 
     # Game Loop
-    running = True  # len(cached_path) > 0
-    current = None
-
+    running = True
     while running:
-        screen.fill(background_colour)
-        maze.draw_grid(screen)
-        maze.draw_cells(screen)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
                 break
 
         # Check for a left mouse click down
+        actions = []
         mouse_pressed = pygame.mouse.get_pressed()
         if mouse_pressed == (1, 0, 0):
             (x, y) = pygame.mouse.get_pos()
-            maze.click_create_tower(x, y)
+            actions.append(Location(y // cell_size, x // cell_size))
 
         clock.tick(tick_time)  # 30 would be real time - slower < 30 > faster
 
-        _temp = current
-        if _temp is not None and maze.cells[_temp.row][_temp.col].color != Colour.BLOCKED:
-            maze.cells[_temp.row][_temp.col].color = Colour.EMPTY
-
-        current = cached_path.pop(0)
-
-        if maze.cells[current.row][current.col].color == Colour.EMPTY:
-            maze.cells[current.row][current.col].color = Colour.ZOMBIE
-
-        elif maze.cells[current.row][current.col].color != Colour.EMPTY:
-            # need to invalidate the cache and start again
-            if _temp is not None:
-                # maze.cells[_temp.row][_temp.col].color = Colour.PATH
-                maze.cells[current.row][current.col].color = Colour.BLOCKED
-                solution = pathfinding.astar(_temp, maze.goal_test, maze.successors, distance)
-            else:
-                solution = pathfinding.astar(current, maze.goal_test, maze.successors, distance)
-
-            if solution is None:
-                print("No solution found using A*!")
-                break
-            else:
-                # print("Problem: Recalculating!")
-                cached_path = pathfinding.node_to_path(solution)
-
-        maze.draw_cells(screen)
-        pygame.display.update()
+        # the frame is the step and the drawing it triggers, not the wait in clock.tick
+        profiler.begin_frame()
+        state = engine.step(actions)
+        profiler.end_frame()
+        if state.stuck:
+            print("No solution found using A*!")
+            break
+        if state.reached_goal:
+            print(f"The zombie reached the goal in {state.tick} ticks!")
+            break
+        if state.killed:
+            print(f"The towers stopped the zombie after {state.tick} ticks!")
+            break
+        # print("Problem: Recalculating!")
+
+    if trace is not None:
+        profiler.dump(trace)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""
+Compact binary maze files.
+
+A file is a fixed size header followed by the grid.Grid's cell codes, one byte a
+cell, border included, in the grid's own row-major layout:
+
+    magic "MAZE", version, flags, rows, cols, start row/col, goal row/col
+
+Stored raw, the codes are memory-mapped copy-on-write and handed to the grid as
+they are, so opening a map reads no more than the pages that get used (plus one
+pass to work out which cells are passable).  With the RLE flag the codes are
+stored as runs instead: a run count, then a 32-bit length per run and a byte code
+per run.  That is much smaller for maps with big open or walled areas but has to
+be decoded into memory on load.
+"""
+import mmap
+import struct
+from array import array
+from typing import Iterable, Tuple
+
+from grid import Grid
+
+MAGIC = b"MAZE"
+VERSION = 1
+RLE = 1  # flag: the cell codes are run-length encoded
+
+HEADER = struct.Struct("<4sBBxxIIIIII")
+RUNS = struct.Struct("<I")
+
+Cell = Tuple[int, int]
+
+
+def _runs(cells) -> Tuple[array, bytearray]:
+    lengths, codes = array("I"), bytearray()
+    i, size = 0, len(cells)
+    while i < size:
+        code = cells[i]
+        j = i + 1
+        while j < size and cells[j] == code:
+            j += 1
+        lengths.append(j - i)
+        codes.append(code)
+        i = j
+    return lengths, codes
+
+
+def save(path: str, grid: Grid, start: Cell, goal: Cell, rle: bool = False) -> None:
+    """
+
+    :param grid: The grid whose cell codes are written.
+    :param start: (row, col) of the start.
+    :param goal: (row, col) of the goal.
+    :param rle: Store the cell codes as runs, smaller for maps with large uniform areas.
+    """
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RLE if rle else 0, grid.rows, grid.cols, *start, *goal))
+        if rle:
+            lengths, codes = _runs(grid.cells)
+            f.write(RUNS.pack(len(codes)))
+            f.write(lengths.tobytes())
+            f.write(codes)
+        else:
+            f.write(grid.cells)
+
+
+def load(path: str, blocked: Iterable[int] = (1,)) -> Tuple[Grid, Cell, Cell]:
+    """
+
+    :param blocked: Cell codes that can't be walked through, as for grid.Grid.
+    :return: (grid, start, goal)
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError(f"{path} is too short to be a maze file")
+        magic, version, flags, rows, cols, start_row, start_col, goal_row, goal_col = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a maze file")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} maze file, only version {VERSION} can be read")
+
+        size = (rows + 2) * (cols + 2)
+        if flags & RLE:
+            (count,) = RUNS.unpack(f.read(RUNS.size))
+            lengths = array("I")
+            lengths.frombytes(f.read(4 * count))
+            codes = f.read(count)
+            cells = bytearray().join(bytes([code]) * length for code, length in zip(codes, lengths))
+        else:
+            if HEADER.size + size > f.seek(0, 2):
+                raise ValueError(f"{path} is truncated")
+            # copy-on-write: edits to the maze never reach the file
+            memory = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            cells = memoryview(memory)[HEADER.size:HEADER.size + size]
+
+    grid = Grid.from_buffer(rows, cols, cells, blocked)
+    return grid, (start_row, start_col), (goal_row, goal_col)
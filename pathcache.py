@@ -0,0 +1,126 @@
+"""
+LRU cache of grid paths that survives edits to the grid.
+
+Entries are keyed on (start, goal) and tagged with the grid version they were
+found at.  The cache watches the grid and only throws away what an edit could
+have changed:
+
+- a cell becoming blocked evicts the cached paths that walk through it
+- a cell opening up evicts the paths it could shorten (a detour through the cell
+  would be shorter than the cached path) and any cached "no path" answers
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import pathfinding
+
+Key = Tuple[int, int]
+
+
+class PathCache:
+    def __init__(
+            self,
+            grid,
+            capacity: int = 256,
+            search: Callable[..., Optional[List[int]]] = pathfinding.grid_astar,
+    ) -> None:
+        """
+
+        :param grid: The grid.Grid the paths are found on.
+        :param capacity: Most paths kept before the least recently used is dropped.
+        :param search: Unit cost grid search used on a miss, called as search(grid, start, goal).
+        """
+        self.grid = grid
+        self.capacity = capacity
+        self.search = search
+        self._entries: OrderedDict[Key, Tuple[int, Optional[List[int]]]] = OrderedDict()
+        self._crossing: Dict[int, Set[Key]] = {}  # cell -> cached paths through it
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # dropped to stay within capacity
+        self.invalidations = 0  # dropped because an edit affected them
+        grid.subscribe(self.cell_changed)
+
+    def detach(self) -> None:
+        self.grid.unsubscribe(self.cell_changed)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def find_path(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        The cached path from start to goal, searched for on a miss; None when there is
+        no path.  A blocked start or goal has none and is never cached.
+        """
+        passable = self.grid.passable
+        if not (passable[start] and passable[goal]):
+            return None
+        key = (start, goal)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        path = self.search(self.grid, start, goal)
+        self._entries[key] = (self.grid.version, path)
+        for cell in path or ():
+            self._crossing.setdefault(cell, set()).add(key)
+        if len(self._entries) > self.capacity:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+        return path
+
+    def version(self, start: int, goal: int) -> Optional[int]:
+        """
+        The grid version a cached path was found at, or None when it isn't cached.
+        """
+        entry = self._entries.get((start, goal))
+        return None if entry is None else entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._crossing.clear()
+
+    def _discard(self, key: Key) -> None:
+        _, path = self._entries.pop(key)
+        for cell in path or ():
+            keys = self._crossing[cell]
+            keys.discard(key)
+            if not keys:
+                del self._crossing[cell]
+
+    def cell_changed(self, index: int, old: int, new: int) -> None:
+        """
+        Grid listener: evict the cached paths the edit could affect.
+        """
+        walkable = self.grid.walkable
+        if walkable[old] == walkable[new]:
+            return
+
+        if not walkable[new]:
+            stale = list(self._crossing.get(index, ()))
+        else:
+            stride = self.grid.stride
+            row, col = divmod(index, stride)
+            stale = []
+            for key, (_, path) in self._entries.items():
+                if path is None:
+                    stale.append(key)
+                    continue
+                start_row, start_col = divmod(key[0], stride)
+                goal_row, goal_col = divmod(key[1], stride)
+                detour = abs(row - start_row) + abs(col - start_col) + abs(row - goal_row) + abs(col - goal_col)
+                if detour < len(path) - 1:
+                    stale.append(key)
+
+        for key in stale:
+            self._discard(key)
+        self.invalidations += len(stale)
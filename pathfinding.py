@@ -1,10 +1,13 @@
 from __future__ import annotations
-from typing import Deque, Dict, List, Callable, Generic, Optional, TypeVar, Set
+from typing import Deque, Dict, List, Callable, Generic, Optional, Sequence, Tuple, TypeVar, Set
 from collections import deque
+from itertools import count
 from heapq import heappush, heappop
 
 T = TypeVar("T")
 
+INF = float("inf")
+
 
 class Stack(Generic[T]):
     """
@@ -71,11 +74,20 @@ class PriorityQueue(Generic[T]):
     def pop(self) -> T:
         return heappop(self._container)  # out by priority
 
+    def peek(self) -> T:
+        return self._container[0]  # next out, without removing it
+
+    def __len__(self) -> int:
+        return len(self._container)
+
     def __repr__(self) -> str:
         return repr(self._container)
 
 
 class Node(Generic[T]):
+    # no per instance __dict__, searches can create a lot of these
+    __slots__ = ("state", "parent", "cost", "heuristic")
+
     def __init__(
             self,
             state: T,
@@ -99,6 +111,33 @@ class Node(Generic[T]):
         return (self.cost + self.heuristic) < (other.cost + other.heuristic)
 
 
+class SearchStats:
+    """
+    Counters filled in by the searches that accept a `stats` argument.  The same
+    instance can be passed to many searches to accumulate totals.
+    """
+
+    def __init__(self) -> None:
+        self.searches: int = 0
+        self.pushes: int = 0
+        self.pops: int = 0
+        self.stale: int = 0  # pops discarded because the state was already expanded
+        self.expanded: int = 0
+
+    def record(self, pushes: int, pops: int, stale: int, expanded: int) -> None:
+        self.searches += 1
+        self.pushes += pushes
+        self.pops += pops
+        self.stale += stale
+        self.expanded += expanded
+
+    def __repr__(self) -> str:
+        return (
+            f"SearchStats(searches={self.searches}, pushes={self.pushes}, pops={self.pops}, "
+            f"stale={self.stale}, expanded={self.expanded})"
+        )
+
+
 # def _dfs(initial, goal_test, successors):
 #     frontier = list()
 #     frontier.append(Node(initial, parent=None))
@@ -119,86 +158,197 @@ class Node(Generic[T]):
 #     return None
 
 
-def dfs(
+# Parent tables: the *_parents searches record where each state was reached from in
+# a dict keyed by state instead of allocating a Node per expansion.  The goal state
+# (or None) and the table are returned; parents_to_path turns them into a path.
+Parents = Dict[T, Optional[T]]
+
+
+def dfs_parents(
         initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]
-) -> Optional[Node[T]]:
+) -> Tuple[Optional[T], Parents]:
     # frontier is where we've yet to go
-    frontier: Stack[Node[T]] = Stack()
-    frontier.push(Node(initial, parent=None))
+    frontier: Stack[T] = Stack()
+    frontier.push(initial)
 
-    # explored is where we've been
-    explored: Set[T] = {initial}
+    # parents doubles as where we've been
+    parents: Parents = {initial: None}
 
     # keep going while there is more to explore
     while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: T = current_node.state
+        current_state: T = frontier.pop()
 
         # if we found the goal, we're done
         if goal_test(current_state):
-            return current_node
+            return current_state, parents
 
         # check where we can go next and haven't explored
         for child in successors(current_state):
-            if child in explored:
+            if child in parents:
                 # skip children we already explored
                 continue
-            explored.add(child)
-            frontier.push(Node(child, current_node))
+            parents[child] = current_state
+            frontier.push(child)
 
-    return None  # went through everything and never found goal
+    return None, parents  # went through everything and never found goal
 
 
-def bfs(
+def bfs_parents(
         initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]
-) -> Optional[Node[T]]:
+) -> Tuple[Optional[T], Parents]:
     # frontier is where we've yet to go
-    frontier: Queue[Node[T]] = Queue()
-    frontier.push(Node(initial, None))  # explored is where we've been
+    frontier: Queue[T] = Queue()
+    frontier.push(initial)  # parents doubles as where we've been
 
-    explored: Set[T] = {initial}
+    parents: Parents = {initial: None}
 
     # keep going while there is more to explore
     while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: T = current_node.state  # if we found the goal, we're done
+        current_state: T = frontier.pop()  # if we found the goal, we're done
         if goal_test(current_state):
-            return current_node
+            return current_state, parents
         # check where we can go next and haven't explored
         for child in successors(current_state):
-            if child in explored:  # skip children we already explored
+            if child in parents:  # skip children we already explored
                 continue
-            explored.add(child)
-            frontier.push(Node(child, current_node))
+            parents[child] = current_state
+            frontier.push(child)
 
-    return None
+    return None, parents
 
 
-def astar(
+def _astar(
         initial: T,
         goal_test: Callable[[T], bool],
         successors: Callable[[T], List[T]],
         heuristic: Callable[[T], float],
-) -> Optional[Node[T]]:
-    # frontier is where we've yet to go
-    frontier: PriorityQueue[Node[T]] = PriorityQueue()
-    frontier.push(
-        Node(initial, None, 0.0, heuristic(initial))
-    )  # explored is where we've been
+        cost: Optional[Callable[[T, T], float]],
+        stats: Optional[SearchStats],
+) -> Tuple[Optional[T], Parents, Dict[T, float]]:
+    # frontier holds (f, -g, insertion order, state): ties on f go to the deeper
+    # state and the insertion order keeps states from ever being compared
+    order = count()
+    frontier: PriorityQueue[Tuple[float, float, int, T]] = PriorityQueue()
+    frontier.push((heuristic(initial), -0.0, next(order), initial))
+    # explored is the best known cost to each state, closed is where we've been
     explored: Dict[T, float] = {initial: 0.0}
+    parents: Parents = {initial: None}
+    closed: Set[T] = set()
+    pushes, pops, stale = 1, 0, 0
+    found: Optional[T] = None
     # keep going while there is more to explore
     while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: T = current_node.state  # if we found the goal, we're done
+        _, current_cost, _, current_state = frontier.pop()
+        pops += 1
+        if current_state in closed:
+            stale += 1  # superseded by a cheaper entry that was already expanded
+            continue
+        closed.add(current_state)
+        # if we found the goal, we're done
         if goal_test(current_state):
-            return current_node
+            found = current_state
+            break
         # check where we can go next and haven't explored
         for child in successors(current_state):
-            new_cost: float = current_node.cost + 1  # assumes a grid, need a cost function for more sophisticated apps
+            if child in closed:
+                continue
+            new_cost: float = -current_cost + (1 if cost is None else cost(current_state, child))
             if child not in explored or explored[child] > new_cost:
                 explored[child] = new_cost
-                frontier.push(Node(child, current_node, new_cost, heuristic(child)))
-    return None  # went through everything and never found goal
+                parents[child] = current_state
+                frontier.push((new_cost + heuristic(child), -new_cost, next(order), child))
+                pushes += 1
+
+    if stats is not None:
+        stats.record(pushes, pops, stale, len(closed))
+    return found, parents, explored
+
+
+def astar_parents(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float],
+        cost: Optional[Callable[[T, T], float]] = None,
+        stats: Optional[SearchStats] = None,
+) -> Tuple[Optional[T], Parents]:
+    found, parents, _ = _astar(initial, goal_test, successors, heuristic, cost, stats)
+    return found, parents
+
+
+def parents_to_path(parents: Parents, state: T) -> List[T]:
+    path: List[T] = [state]
+    # work backwards from end to front
+    while parents[state] is not None:
+        state = parents[state]
+        path.append(state)
+
+    path.reverse()
+
+    return path
+
+
+def _path_to_node(
+        path: List[T], costs: Optional[Dict[T, float]] = None, heuristic: Optional[Callable[[T], float]] = None
+) -> Node[T]:
+    # only the nodes on the solution are ever built
+    node: Optional[Node[T]] = None
+    for state in path:
+        node = Node(
+            state,
+            node,
+            0.0 if costs is None else costs[state],
+            0.0 if heuristic is None else heuristic(state),
+        )
+    return node
+
+
+def dfs(
+        initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]
+) -> Optional[Node[T]]:
+    found, parents = dfs_parents(initial, goal_test, successors)
+    if found is None:
+        return None  # went through everything and never found goal
+    return _path_to_node(parents_to_path(parents, found))
+
+
+def bfs(
+        initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]
+) -> Optional[Node[T]]:
+    found, parents = bfs_parents(initial, goal_test, successors)
+    if found is None:
+        return None
+    return _path_to_node(parents_to_path(parents, found))
+
+
+def astar(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float],
+        cost: Optional[Callable[[T, T], float]] = None,
+        stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
+    """
+
+    :param cost: Cost of moving from the first state to the second, every step costs 1 when not given.
+    :param stats: Collects push/pop/stale counters for the search when given.
+    """
+    found, parents, explored = _astar(initial, goal_test, successors, heuristic, cost, stats)
+    if found is None:
+        return None  # went through everything and never found goal
+    return _path_to_node(parents_to_path(parents, found), explored, heuristic)
+
+
+def dijkstra(
+        initial: T,
+        goal_test: Callable[[T], bool],
+        successors: Callable[[T], List[T]],
+        cost: Optional[Callable[[T, T], float]] = None,
+        stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
+    # Dijkstra is A* without any guidance towards the goal
+    return astar(initial, goal_test, successors, lambda _: 0.0, cost, stats)
 
 
 def node_to_path(node: Node[T]) -> List[T]:
@@ -211,3 +361,539 @@ def node_to_path(node: Node[T]) -> List[T]:
     path.reverse()
 
     return path
+
+
+# __ Bidirectional searches __
+# Search forward from initial and backwards from goal at the same time and stop
+# when the two meet.  predecessors(state) lists the states that can reach state;
+# for undirected graphs (like the maze) it is the same as successors.
+
+
+def _join(forward: Parents, backward: Parents, meet: T) -> List[T]:
+    path = parents_to_path(forward, meet)
+    state = backward[meet]
+    while state is not None:
+        path.append(state)
+        state = backward[state]
+    return path
+
+
+def bidirectional_bfs(
+        initial: T,
+        goal: T,
+        successors: Callable[[T], List[T]],
+        predecessors: Optional[Callable[[T], List[T]]] = None,
+        stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
+    predecessors = successors if predecessors is None else predecessors
+    forward: Parents = {initial: None}
+    backward: Parents = {goal: None}
+    depth: Dict[T, int] = {initial: 0}
+    back_depth: Dict[T, int] = {goal: 0}
+    forward_layer: List[T] = [initial]
+    backward_layer: List[T] = [goal]
+    expanded = 0
+    meet: Optional[T] = None if initial != goal else initial
+
+    while meet is None and forward_layer and backward_layer:
+        # always grow the smaller side by a whole layer
+        grow_forward = len(forward_layer) <= len(backward_layer)
+        layer = forward_layer if grow_forward else backward_layer
+        parents, other = (forward, backward) if grow_forward else (backward, forward)
+        depths, other_depths = (depth, back_depth) if grow_forward else (back_depth, depth)
+        expand = successors if grow_forward else predecessors
+        best = INF
+        next_layer: List[T] = []
+        for state in layer:
+            expanded += 1
+            for child in expand(state):
+                if child in parents:
+                    continue
+                parents[child] = state
+                depths[child] = depths[state] + 1
+                next_layer.append(child)
+                if child in other and depths[child] + other_depths[child] < best:
+                    best, meet = depths[child] + other_depths[child], child
+        if grow_forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    if stats is not None:
+        stats.record(len(forward) + len(backward), expanded, 0, expanded)
+    if meet is None:
+        return None
+    return _path_to_node(_join(forward, backward, meet))
+
+
+def bidirectional_astar(
+        initial: T,
+        goal: T,
+        successors: Callable[[T], List[T]],
+        heuristic: Callable[[T], float],
+        reverse_heuristic: Callable[[T], float],
+        predecessors: Optional[Callable[[T], List[T]]] = None,
+        cost: Optional[Callable[[T, T], float]] = None,
+        stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
+    """
+
+    :param heuristic: Estimate from a state to the goal.
+    :param reverse_heuristic: Estimate from a state back to initial.
+    :param cost: Cost of moving from the first state to the second, every step costs 1 when not given.
+    """
+    if initial == goal:
+        # meetings are only spotted on a child, so this would come back as a detour (or nothing)
+        if stats is not None:
+            stats.record(1, 0, 0, 0)
+        return _path_to_node([initial], {initial: 0.0})
+    predecessors = successors if predecessors is None else predecessors
+    order = count()
+    # one of everything per direction: 0 is forward, 1 is backward
+    frontiers: List[PriorityQueue[Tuple[float, float, int, T]]] = [PriorityQueue(), PriorityQueue()]
+    frontiers[0].push((heuristic(initial), -0.0, next(order), initial))
+    frontiers[1].push((reverse_heuristic(goal), -0.0, next(order), goal))
+    explored: List[Dict[T, float]] = [{initial: 0.0}, {goal: 0.0}]
+    parents: List[Parents] = [{initial: None}, {goal: None}]
+    closed: List[Set[T]] = [set(), set()]
+    estimates = (heuristic, reverse_heuristic)
+    expands = (successors, predecessors)
+    pushes, pops, stale = 2, 0, 0
+    best, meet = INF, None
+
+    while not frontiers[0].empty and not frontiers[1].empty:
+        # stop once neither side can still find anything shorter than the best meeting
+        if max(frontiers[0].peek()[0], frontiers[1].peek()[0]) >= best:
+            break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        _, current_cost, _, current_state = frontiers[side].pop()
+        pops += 1
+        if current_state in closed[side]:
+            stale += 1
+            continue
+        closed[side].add(current_state)
+        for child in expands[side](current_state):
+            if child in closed[side]:
+                continue
+            step = 1 if cost is None else (cost(current_state, child) if side == 0 else cost(child, current_state))
+            new_cost = -current_cost + step
+            if child not in explored[side] or explored[side][child] > new_cost:
+                explored[side][child] = new_cost
+                parents[side][child] = current_state
+                frontiers[side].push((new_cost + estimates[side](child), -new_cost, next(order), child))
+                pushes += 1
+                if child in explored[1 - side] and new_cost + explored[1 - side][child] < best:
+                    best, meet = new_cost + explored[1 - side][child], child
+    if initial == goal:
+        meet = initial
+
+    if stats is not None:
+        stats.record(pushes, pops, stale, len(closed[0]) + len(closed[1]))
+    if meet is None:
+        return None
+    path = _join(parents[0], parents[1], meet)
+    costs: Dict[T, float] = {path[0]: 0.0}
+    for a, b in zip(path, path[1:]):
+        costs[b] = costs[a] + (1 if cost is None else cost(a, b))
+    return _path_to_node(path, costs, heuristic)
+
+
+# __ Grid specialised searches __
+# These work directly on a grid.Grid: states are integer cell indices and the
+# successors are the precomputed neighbour offsets, so there is no per-cell
+# object or tuple allocation in the inner loop.
+
+
+def _index_path(came_from: Dict[int, int], goal: int) -> List[int]:
+    path: List[int] = [goal]
+    # work backwards from end to front
+    parent = came_from[goal]
+    while parent != -1:
+        path.append(parent)
+        parent = came_from[parent]
+
+    path.reverse()
+
+    return path
+
+
+def grid_bfs(grid, start: int, goal: int, stats: Optional[SearchStats] = None) -> Optional[List[int]]:
+    passable = grid.passable
+    offsets = grid.offsets
+    came_from: Dict[int, int] = {start: -1}
+    frontier: Deque[int] = deque([start])
+    pops = 0
+    path: Optional[List[int]] = None
+    while frontier:
+        current = frontier.popleft()
+        pops += 1
+        if current == goal:
+            path = _index_path(came_from, goal)
+            break
+        for offset in offsets:
+            child = current + offset
+            if passable[child] and child not in came_from:
+                came_from[child] = current
+                frontier.append(child)
+
+    if stats is not None:
+        stats.record(len(came_from), pops, 0, pops)
+    return path
+
+
+def grid_astar(
+        grid, start: int, goal: int, costs: Optional[Sequence[float]] = None, stats: Optional[SearchStats] = None
+) -> Optional[List[int]]:
+    """
+
+    :param costs: Cost of entering a cell indexed by its cell code; every step costs 1 when not given.
+    :param stats: Collects push/pop/stale counters for the search when given.
+    """
+    if costs is not None:
+        return _grid_weighted(grid, start, goal, costs, True, stats)
+
+    passable = grid.passable
+    offsets = grid.offsets
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+
+    came_from: Dict[int, int] = {start: -1}
+    explored: Dict[int, int] = {start: 0}
+    row, col = divmod(start, stride)
+    # ties on f are broken toward the deeper node (-cost) which avoids expanding
+    # the whole band of equally good cells on open ground
+    frontier: List = [(abs(row - goal_row) + abs(col - goal_col), 0, start)]
+    pushes, pops, stale = 1, 0, 0
+    path: Optional[List[int]] = None
+    while frontier:
+        _, cost, current = heappop(frontier)
+        pops += 1
+        cost = -cost
+        if current == goal:
+            path = _index_path(came_from, goal)
+            break
+        if cost > explored[current]:
+            stale += 1  # a cheaper route to this cell was already expanded
+            continue
+        new_cost = cost + 1
+        for offset in offsets:
+            child = current + offset
+            if passable[child] and new_cost < explored.get(child, new_cost + 1):
+                explored[child] = new_cost
+                came_from[child] = current
+                row, col = divmod(child, stride)
+                heappush(frontier, (new_cost + abs(row - goal_row) + abs(col - goal_col), -new_cost, child))
+                pushes += 1
+
+    if stats is not None:
+        stats.record(pushes, pops, stale, pops - stale)
+    return path
+
+
+def grid_dijkstra(
+        grid, start: int, goal: int, costs: Optional[Sequence[float]] = None, stats: Optional[SearchStats] = None
+) -> Optional[List[int]]:
+    if costs is None:
+        return grid_bfs(grid, start, goal, stats)  # with unit costs breadth first is already optimal
+    return _grid_weighted(grid, start, goal, costs, False, stats)
+
+
+def _grid_weighted(
+        grid, start: int, goal: int, costs: Sequence[float], guided: bool, stats: Optional[SearchStats]
+) -> Optional[List[int]]:
+    passable = grid.passable
+    cells = grid.cells
+    offsets = grid.offsets
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+    # scale the manhattan distance by the cheapest step so it never overestimates
+    scale = min(costs[code] for code in range(len(costs)) if grid.walkable[code]) if guided else 0
+
+    came_from: Dict[int, int] = {start: -1}
+    explored: Dict[int, float] = {start: 0.0}
+    frontier: List = [(0.0, 0.0, start)]
+    pushes, pops, stale = 1, 0, 0
+    path: Optional[List[int]] = None
+    while frontier:
+        _, cost, current = heappop(frontier)
+        pops += 1
+        cost = -cost
+        if current == goal:
+            path = _index_path(came_from, goal)
+            break
+        if cost > explored[current]:
+            stale += 1
+            continue
+        for offset in offsets:
+            child = current + offset
+            if not passable[child]:
+                continue
+            new_cost = cost + costs[cells[child]]
+            if new_cost < explored.get(child, INF):
+                explored[child] = new_cost
+                came_from[child] = current
+                row, col = divmod(child, stride)
+                estimate = (abs(row - goal_row) + abs(col - goal_col)) * scale
+                heappush(frontier, (new_cost + estimate, -new_cost, child))
+                pushes += 1
+
+    if stats is not None:
+        stats.record(pushes, pops, stale, pops - stale)
+    return path
+
+
+class DStarLite:
+    """
+    Incremental grid planner (D* Lite, Koenig & Likhachev).
+
+    The search runs backwards from the goal so the tree survives the agent moving.
+    The planner subscribes to the grid; whenever a cell changes between passable and
+    blocked only the affected cells are queued for repair and the next `plan` call
+    fixes up the existing search tree instead of starting over.
+    """
+
+    def __init__(self, grid, start: int, goal: int) -> None:
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self._last = start
+        self._km = 0
+        self._g: Dict[int, float] = {}
+        self._rhs: Dict[int, float] = {goal: 0}
+        self._open: Dict[int, tuple] = {}  # state -> current key, anything else in the heap is stale
+        self._heap: List = []
+        self._changed: Set[int] = set()
+        self._pushes = 0
+        self._insert(goal, (self._h(start, goal), 0))
+        grid.subscribe(self.cell_changed)
+
+    def detach(self) -> None:
+        self.grid.unsubscribe(self.cell_changed)
+
+    def _h(self, a: int, b: int) -> int:
+        a_row, a_col = divmod(a, self.grid.stride)
+        b_row, b_col = divmod(b, self.grid.stride)
+        return abs(a_row - b_row) + abs(a_col - b_col)
+
+    def _key(self, state: int) -> tuple:
+        best = min(self._g.get(state, INF), self._rhs.get(state, INF))
+        return best + self._h(self.start, state) + self._km, best
+
+    def _insert(self, state: int, key: tuple) -> None:
+        self._open[state] = key
+        self._pushes += 1
+        heappush(self._heap, (key, state))
+
+    def _top_key(self) -> tuple:
+        heap = self._heap
+        while heap and self._open.get(heap[0][1]) != heap[0][0]:
+            heappop(heap)  # discard stale entries
+        return heap[0][0] if heap else (INF, INF)
+
+    def _update(self, state: int) -> None:
+        g = self._g
+        if state != self.goal:
+            best = INF
+            if self.grid.passable[state]:
+                for offset in self.grid.offsets:
+                    child = state + offset
+                    if self.grid.passable[child]:
+                        cost = g.get(child, INF) + 1
+                        if cost < best:
+                            best = cost
+            self._rhs[state] = best
+        self._open.pop(state, None)
+        if g.get(state, INF) != self._rhs.get(state, INF):
+            self._insert(state, self._key(state))
+
+    def _compute(self) -> Tuple[int, int]:
+        """
+        :return: (pops, stale) where stale pops only had their key brought up to date.
+        """
+        g, rhs, offsets = self._g, self._rhs, self.grid.offsets
+        start = self.start
+        pops = stale = 0
+        while self._top_key() < self._key(start) or rhs.get(start, INF) != g.get(start, INF):
+            if not self._heap:
+                break
+            old_key, state = heappop(self._heap)
+            pops += 1
+            new_key = self._key(state)
+            if old_key < new_key:
+                stale += 1
+                self._insert(state, new_key)
+                continue
+            del self._open[state]
+            if g.get(state, INF) > rhs.get(state, INF):
+                g[state] = rhs[state]
+            else:
+                g[state] = INF
+                self._update(state)
+            for offset in offsets:
+                neighbour = state + offset
+                if self.grid.passable[neighbour]:
+                    self._update(neighbour)
+        return pops, stale
+
+    def cell_changed(self, index: int, old: int, new: int) -> None:
+        """
+        Grid listener: remember cells whose passability flipped.
+        """
+        walkable = self.grid.walkable
+        if walkable[old] != walkable[new]:
+            self._changed.add(index)
+
+    def move_to(self, start: int) -> None:
+        """
+        Tell the planner the agent has moved; the search tree is kept.
+        """
+        self.start = start
+
+    def plan(self, stats: Optional[SearchStats] = None) -> Optional[List[int]]:
+        """
+        Repair the search tree for any pending changes and return the path from the
+        current start to the goal, or None if the goal can't be reached.
+
+        :param stats: Collects the counters of the repair when given.
+        """
+        pushes = self._pushes
+        # every move since the last plan lowers the keys still in the heap, whether or
+        # not anything changed, or they stop being lower bounds on the next repair
+        self._km += self._h(self._last, self.start)
+        self._last = self.start
+        if self._changed:
+            changed, self._changed = self._changed, set()
+            for index in changed:
+                self._update(index)
+                for offset in self.grid.offsets:
+                    neighbour = index + offset
+                    if self.grid.passable[neighbour]:
+                        self._update(neighbour)
+        pops, stale = self._compute()
+        if stats is not None:
+            stats.record(self._pushes - pushes, pops, stale, pops - stale)
+
+        g = self._g
+        current = self.start
+        if g.get(current, INF) == INF:
+            return None
+        path: List[int] = [current]
+        seen = {current}
+        while current != self.goal:
+            best, best_cost = -1, INF
+            for offset in self.grid.offsets:
+                child = current + offset
+                if self.grid.passable[child]:
+                    cost = g.get(child, INF)
+                    if cost < best_cost:
+                        best, best_cost = child, cost
+            if best == -1 or best in seen:
+                return None  # a walk that comes back on itself would never reach the goal
+            current = best
+            seen.add(current)
+            path.append(current)
+
+        return path
+
+
+# __ Jump Point Search __
+# 4-connected JPS.  Optimal paths are made canonical by always taking vertical
+# steps before horizontal ones, so a horizontal run only needs to stop where a
+# wall forces a vertical turn, and a vertical run stops wherever a horizontal run
+# from it would stop.  Only those jump points go on the heap.
+
+
+def _jump_horizontal(passable, stride: int, current: int, step: int, goal: int) -> int:
+    while True:
+        current += step
+        if not passable[current]:
+            return -1
+        if current == goal:
+            return current
+        # forced neighbour: the cell above/below is open but the one we came past isn't
+        if (passable[current - stride] and not passable[current - stride - step]) or \
+                (passable[current + stride] and not passable[current + stride - step]):
+            return current
+
+
+def _jump_vertical(passable, stride: int, current: int, step: int, goal: int) -> int:
+    while True:
+        current += step
+        if not passable[current]:
+            return -1
+        if current == goal:
+            return current
+        if _jump_horizontal(passable, stride, current, 1, goal) != -1 or \
+                _jump_horizontal(passable, stride, current, -1, goal) != -1:
+            return current
+
+
+def grid_jps(grid, start: int, goal: int, stats: Optional[SearchStats] = None) -> Optional[List[int]]:
+    """
+    Jump Point Search on a uniform cost 4-connected grid.  Returns every cell of the
+    path (the same format as grid_astar), only the jump points are searched.
+    """
+    passable = grid.passable
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+
+    came_from: Dict[int, int] = {start: -1}
+    heading: Dict[int, int] = {start: 0}  # direction each jump point was reached with
+    explored: Dict[int, int] = {start: 0}
+    row, col = divmod(start, stride)
+    frontier: List = [(abs(row - goal_row) + abs(col - goal_col), 0, start)]
+    pushes, pops, stale = 1, 0, 0
+    found = False
+    while frontier:
+        _, cost, current = heappop(frontier)
+        pops += 1
+        cost = -cost
+        if current == goal:
+            found = True
+            break
+        if cost > explored[current]:
+            stale += 1
+            continue
+
+        direction = heading[current]
+        if direction == 0:
+            directions = (-stride, stride, -1, 1)
+        elif direction in (1, -1):
+            directions = [direction]
+            for vertical in (-stride, stride):
+                if passable[current + vertical] and not passable[current + vertical - direction]:
+                    directions.append(vertical)
+        else:
+            directions = (direction, -1, 1)
+
+        for direction in directions:
+            if direction in (1, -1):
+                point = _jump_horizontal(passable, stride, current, direction, goal)
+            else:
+                point = _jump_vertical(passable, stride, current, direction, goal)
+            if point == -1:
+                continue
+            distance = abs(point - current)
+            new_cost = cost + (distance if direction in (1, -1) else distance // stride)
+            if new_cost < explored.get(point, new_cost + 1):
+                explored[point] = new_cost
+                came_from[point] = current
+                heading[point] = direction
+                row, col = divmod(point, stride)
+                heappush(frontier, (new_cost + abs(row - goal_row) + abs(col - goal_col), -new_cost, point))
+                pushes += 1
+
+    if stats is not None:
+        stats.record(pushes, pops, stale, pops - stale)
+    if not found:
+        return None
+
+    # fill in the straight runs between jump points
+    points = _index_path(came_from, goal)
+    path: List[int] = [start]
+    for a, b in zip(points, points[1:]):
+        step = 1 if abs(b - a) < stride else stride
+        step = step if b > a else -step
+        path.extend(range(a + step, b + step, step))
+
+    return path
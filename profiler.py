@@ -0,0 +1,195 @@
+"""
+Frame-time profiler for the game loops.
+
+Named scopes time the phases of a frame (planning, shooting, drawing, sending
+the display) and counters add up per frame values such as nodes expanded or
+replans.  The last `window` frames are kept for rolling p50/p99 figures, which
+can be drawn as an overlay; with `trace` every frame is also kept so it can be
+written out as CSV or JSON.
+
+A disabled profiler hands back one shared do-nothing scope and returns straight
+away from everything else, so instrumented code costs a method call when off.
+"""
+import csv
+import json
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+FRAME = "frame"  # the name the whole frame's time is kept under
+
+
+class _NullScope:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *_) -> None:
+        pass
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    """
+    Times one named phase; reused for every frame so timing allocates nothing.
+    Scopes of different names can nest, the same name can't.
+    """
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.began = 0.0
+
+    def __enter__(self) -> None:
+        self.began = time.perf_counter()
+
+    def __exit__(self, *_) -> None:
+        times = self.profiler._times
+        times[self.name] = times.get(self.name, 0.0) + time.perf_counter() - self.began
+
+
+class Profiler:
+    def __init__(self, enabled: bool = True, window: int = 300, trace: bool = False) -> None:
+        """
+
+        :param enabled: When False every call returns straight away.
+        :param window: Frames the rolling statistics are worked out over.
+        :param trace: Keep every frame for dump_csv/dump_json, not just the last window.
+        """
+        self.enabled = enabled
+        self.window = window
+        self.frames = 0
+        self.history: Dict[str, Deque[float]] = {}  # seconds (or counts) per frame, last window frames
+        self.trace: Optional[List[Dict[str, float]]] = [] if trace else None
+        self._scopes: Dict[str, _Scope] = {}
+        self._times: Dict[str, float] = {}
+        self._counts: Dict[str, float] = {}
+        self._began: Optional[float] = None
+
+    def scope(self, name: str):
+        """
+        A context manager adding the time spent inside it to name for this frame.
+        """
+        if not self.enabled:
+            return _NULL_SCOPE
+        scope = self._scopes.get(name)
+        if scope is None:
+            scope = self._scopes[name] = _Scope(self, name)
+        return scope
+
+    def count(self, name: str, amount: float = 1) -> None:
+        if self.enabled:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def begin_frame(self) -> None:
+        if self.enabled:
+            self._began = time.perf_counter()
+
+    def end_frame(self) -> None:
+        """
+        Close the frame: its scope times and counters go into the rolling history
+        (and the trace) and start again from zero.
+        """
+        if not self.enabled or self._began is None:
+            return
+        self._times[FRAME] = time.perf_counter() - self._began
+        self._began = None
+        self.frames += 1
+
+        record = dict(self._times)
+        record.update(self._counts)
+        for name in self.history:
+            record.setdefault(name, 0)  # nothing timed or counted is a 0 for this frame
+        for name, value in record.items():
+            values = self.history.get(name)
+            if values is None:
+                values = self.history[name] = deque(maxlen=self.window)
+            values.append(value)
+        if self.trace is not None:
+            record["index"] = self.frames
+            self.trace.append(record)
+        self._times.clear()
+        self._counts.clear()
+
+    def percentile(self, name: str, q: float) -> float:
+        """
+        The q-th percentile (0-100) of name over the window, nearest rank.
+        """
+        values = sorted(self.history.get(name, ()))
+        if not values:
+            return 0.0
+        # the smallest value with at least q% of the values at or below it
+        rank = max(0, min(len(values) - 1, math.ceil(q * len(values) / 100) - 1))
+        return values[rank]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        p50, p99 and mean of everything timed or counted over the window.
+        """
+        return {
+            name: {
+                "p50": self.percentile(name, 50),
+                "p99": self.percentile(name, 99),
+                "mean": sum(values) / len(values),
+            }
+            for name, values in self.history.items()
+            if values
+        }
+
+    def lines(self) -> List[str]:
+        """
+        The summary as text, times in milliseconds, the frame first.
+        """
+        lines = []
+        for name, stats in sorted(self.summary().items(), key=lambda item: item[0] != FRAME):
+            if name in self._scopes or name == FRAME:
+                lines.append(f"{name:<8} p50 {stats['p50'] * 1000:6.2f}ms  p99 {stats['p99'] * 1000:6.2f}ms")
+            else:
+                lines.append(f"{name:<8} p50 {stats['p50']:8g}  p99 {stats['p99']:8g}")
+        return lines
+
+    def draw(self, surface, font, pos: Tuple[int, int] = (4, 4)) -> Tuple[int, int, int, int]:
+        """
+        Draw the summary on an opaque panel, returns the rect it covers.
+
+        :param font: A pygame.font.Font for the text.
+        """
+        rendered = [font.render(line, True, (230, 230, 230)) for line in self.lines()]
+        width = max((text.get_width() for text in rendered), default=0) + 8
+        height = sum(text.get_height() for text in rendered) + 8
+        rect = (pos[0], pos[1], width, height)
+        surface.fill((0, 0, 0), rect)
+        y = pos[1] + 4
+        for text in rendered:
+            surface.blit(text, (pos[0] + 4, y))
+            y += text.get_height()
+        return rect
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"summary": self.summary(), "frames": self.trace or []}, f, indent=1)
+
+    def dump_csv(self, path: str) -> None:
+        """
+        One row per traced frame, a column per scope or counter (blank before it first happened).
+        """
+        frames = self.trace or []
+        columns = ["index", FRAME] + sorted({name for record in frames for name in record} - {"index", FRAME})
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, columns)
+            writer.writeheader()
+            writer.writerows(frames)
+
+    def dump(self, path: str) -> None:
+        """
+        dump_csv for a .csv path, dump_json for anything else.
+        """
+        if path.endswith(".csv"):
+            self.dump_csv(path)
+        else:
+            self.dump_json(path)
+
+
+DISABLED = Profiler(enabled=False)
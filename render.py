@@ -0,0 +1,107 @@
+"""
+Dirty rectangle rendering shared by the games.
+
+The static parts of a board (background colour and grid lines) are drawn once to
+a cached background surface.  Each frame the game restores the background under
+whatever changed, draws the changed things on top and only those rects are sent
+to the display, so a frame costs what changed rather than the board area.
+"""
+from typing import Callable, List, Tuple
+
+import pygame
+
+Rect = Tuple[int, int, int, int]
+
+
+def grid_background(size: Tuple[int, int], colour: tuple, draw_grid: Callable[[pygame.Surface], None]) -> pygame.Surface:
+    """
+    Build the cached background: a filled surface with the grid lines drawn once.
+    """
+    background = pygame.Surface(size)
+    background.fill(colour)
+    draw_grid(background)
+    return background
+
+
+class DirtyRenderer:
+    def __init__(self, surface: pygame.Surface, background: pygame.Surface) -> None:
+        self.surface = surface
+        self.background = background
+        self._dirty: List[Rect] = []
+        self._full = True  # the first update sends the whole screen
+        surface.blit(background, (0, 0))
+
+    def restore(self, rect: Rect) -> None:
+        """
+        Put the background back under rect and mark it for the next update.
+        """
+        self.surface.blit(self.background, rect[:2], rect)
+        self._dirty.append(rect)
+
+    def mark(self, rect: Rect) -> None:
+        """
+        Mark rect for the next update without touching the surface.
+        """
+        self._dirty.append(rect)
+
+    def redraw(self) -> None:
+        """
+        Restore the whole background and send the whole screen on the next update.
+        """
+        self.surface.blit(self.background, (0, 0))
+        self._full = True
+
+    def update(self) -> None:
+        if self._full:
+            pygame.display.update()  # updates the entire surface
+        elif self._dirty:
+            pygame.display.update(self._dirty)  # only the rect areas passed in
+        self._dirty = []
+        self._full = False
+
+
+class TileBatch:
+    """
+    Draws every cell of a grid.Grid in one go.
+
+    The grid's own bytearray of cell codes is wrapped (without copying) as an 8-bit
+    palette surface, one pixel per cell, so it is always in sync with the grid.  A
+    frame is one scale up to the board size plus one blit of a cached overlay that
+    puts back the grid lines and the gaps between cells.
+    """
+
+    def __init__(
+            self,
+            grid,
+            palette: List[tuple],
+            cell_size: int,
+            background: pygame.Surface,
+            key: tuple = (255, 0, 255),
+    ) -> None:
+        """
+
+        :param grid: The grid.Grid whose cell codes are drawn.
+        :param palette: The colour of each cell code.
+        :param cell_size: Size of a cell on screen in pixels.
+        :param background: The board background (grid lines included) the cells sit on.
+        :param key: A colour that never appears in the background, used to cut the cells out of the overlay.
+        """
+        self.grid = grid
+        self.size = (grid.cols * cell_size, grid.rows * cell_size)
+        indexed = pygame.image.frombuffer(grid.cells, (grid.stride, grid.rows + 2), "P")
+        indexed.set_palette(list(palette) + [(0, 0, 0)] * (256 - len(palette)))
+        self._indexed = indexed
+        self._cells = indexed.subsurface((1, 1, grid.cols, grid.rows))  # without the border
+        self._scaled = pygame.transform.scale(self._cells, self.size)
+
+        # the background with a hole where each cell's square is drawn
+        self.overlay = background.copy()
+        for row in range(grid.rows):
+            for col in range(grid.cols):
+                self.overlay.fill(key, (col * cell_size + 1, row * cell_size + 1, cell_size - 2, cell_size - 2))
+        self.overlay.set_colorkey(key)
+
+    def draw(self, surface: pygame.Surface) -> None:
+        pygame.transform.scale(self._cells, self.size, self._scaled)
+        surface.blit(self._scaled, (0, 0))
+        surface.blit(self.overlay, (0, 0))
@@ -0,0 +1,114 @@
+"""
+Many snake games stepped at once with NumPy, for training and simulation.
+
+Every game is the same as snake_game.SnakeEngine (wrap-around edges, the body
+follows the head, eating grows the tail, running into yourself ends the game) but
+the state of all games lives in arrays and one `step` moves them all:
+
+- body: a ring buffer per game of the cells the snake covers, head at head_ptr
+- occupancy: how many body parts sit on each cell, for O(1) collision checks
+- direction, length, snack and alive: one entry per game
+
+A cell is `row * rows + col` with row/col in snake_game's Position order.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+# indexed by direction: left, right, up, down -- the same order as snake_game.FACING
+LEFT, RIGHT, UP, DOWN = range(4)
+ROW_STEP = np.array([-1, 1, 0, 0])
+COL_STEP = np.array([0, 0, -1, 1])
+
+
+class SnakeBatch:
+    def __init__(self, games: int, rows: int = 20, seed: Optional[int] = None) -> None:
+        self.games = games
+        self.rows = rows
+        self.cells = rows * rows
+        self.rng = np.random.default_rng(seed)
+
+        self.body = np.zeros((games, self.cells), dtype=np.int32)
+        self.head_ptr = np.zeros(games, dtype=np.int64)
+        self.length = np.ones(games, dtype=np.int64)
+        self.direction = np.full(games, RIGHT, dtype=np.int64)
+        self.occupancy = np.zeros((games, self.cells), dtype=np.uint8)
+        self.snack = np.zeros(games, dtype=np.int64)
+        self.alive = np.ones(games, dtype=bool)
+        self.ticks = np.zeros(games, dtype=np.int64)
+        self.reset()
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """
+        Start the games selected by mask (all of them by default) again: a snake of one
+        cell in the top left corner heading right.
+        """
+        games = np.arange(self.games) if mask is None else np.flatnonzero(mask)
+        self.body[games, 0] = 0
+        self.head_ptr[games] = 0
+        self.length[games] = 1
+        self.direction[games] = RIGHT
+        self.occupancy[games] = 0
+        self.occupancy[games, 0] = 1
+        self.alive[games] = True
+        self.ticks[games] = 0
+        self._place_snacks(games)
+
+    def _place_snacks(self, games: np.ndarray) -> None:
+        if not len(games):
+            return
+        # uniform over each game's free cells: the highest random score among them
+        free = self.occupancy[games] == 0
+        scores = self.rng.random((len(games), self.cells)) * free
+        self.snack[games] = np.where(free.any(axis=1), scores.argmax(axis=1), -1)
+
+    def heads(self) -> np.ndarray:
+        return self.body[np.arange(self.games), self.head_ptr]
+
+    def step(self, actions: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advance every live game by one tick.
+
+        :param actions: Per game direction to turn to (LEFT/RIGHT/UP/DOWN) or -1 to carry on.
+        :return: (ate, died) boolean arrays for this tick.
+        """
+        ate = np.zeros(self.games, dtype=bool)
+        died = np.zeros(self.games, dtype=bool)
+        games = np.flatnonzero(self.alive)
+        if not len(games):
+            return ate, died
+
+        if actions is not None:
+            action = actions[games]
+            turning = action >= 0
+            self.direction[games[turning]] = action[turning]
+
+        direction = self.direction[games]
+        head = self.body[games, self.head_ptr[games]]
+        row, col = np.divmod(head, self.rows)
+        row = (row + ROW_STEP[direction]) % self.rows
+        col = (col + COL_STEP[direction]) % self.rows
+        new_head = row * self.rows + col
+
+        # the tail moves on unless the snake is growing
+        eating = new_head == self.snack[games]
+        moving = games[~eating]
+        tail_ptr = (self.head_ptr[moving] - self.length[moving] + 1) % self.cells
+        self.occupancy[moving, self.body[moving, tail_ptr]] -= 1
+
+        crashed = self.occupancy[games, new_head] > 0
+        self.alive[games[crashed]] = False
+        died[games[crashed]] = True
+
+        ok = ~crashed
+        live, new_head = games[ok], new_head[ok]
+        self.head_ptr[live] = (self.head_ptr[live] + 1) % self.cells
+        self.body[live, self.head_ptr[live]] = new_head
+        self.occupancy[live, new_head] += 1
+        self.ticks[live] += 1
+
+        grown = games[eating & ok]
+        self.length[grown] += 1
+        ate[grown] = True
+        self._place_snacks(grown)
+        return ate, died
@@ -16,6 +16,9 @@ import typing
 
 import pygame
 
+from freecells import FreeCells
+from render import DirtyRenderer, grid_background
+
 Facing = collections.namedtuple("facing", ("left", "right", "up", "down"))
 FACING = Facing(left=(-1, 0), right=(1, 0), up=(0, -1), down=(0, 1))
 
@@ -43,6 +46,13 @@ class Cube:
         self.direction = direction
         self.pos = Position(self.pos.row + self.direction[0], self.pos.col + self.direction[1])
 
+    def rect(self) -> typing.Tuple[int, int, int, int]:
+        """
+        The screen area of the whole cell the cube sits in (including its border).
+        """
+        length = self.width // self.rows
+        return self.pos.row * length, self.pos.col * length, length, length
+
     def draw(self, surface, eyes=False):
         length = self.width // self.rows
 
@@ -62,113 +72,89 @@ class Cube:
 
 
 class Snake:
-    body = []
-    turns = dict()
+    """
+    The body is a deque of positions, head first, with a set of the cells it covers:
+    moving, growing and checking for a crash only ever touch the two ends, so a long
+    snake costs the same per tick as a short one.
+    """
 
-    def __init__(self, color, pos: (int, int)):
+    def __init__(self, color, pos: (int, int), rows: typing.Optional[int] = None):
         self.color = color
-        self.head = Cube(pos)
-        self.body.append(self.head)
+        self.rows = Cube.rows if rows is None else rows
+        self.body: typing.Deque[Position] = collections.deque([pos])
+        self.occupied: typing.Set[Position] = {pos}
+        # every cell the snake isn't on, for O(1) snack placement
+        self.free: FreeCells[Position] = FreeCells(
+            Position(row, col) for row in range(self.rows) for col in range(self.rows) if (row, col) != pos
+        )
         self.direction = FACING.right
+        self.vacated: typing.Optional[Position] = None  # the cell the tail left on the last move
+        self._brush = Cube(pos)  # draws each segment, so there's no Cube per segment
 
-    def move(self):
-        """
-        Sets the current position of each cube of the snake body and then moves
-        each cube in the direction it should go.
-        :return:
-        """
-
-        # Keypresses that are interesting and their direction values.
-        choices = {
-            pygame.K_LEFT: FACING.left,
-            pygame.K_RIGHT: FACING.right,
-            pygame.K_UP: FACING.up,
-            pygame.K_DOWN: FACING.down,
-        }
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            else:
-                pos = (
-                    event.dict.get("key", None)
-                    if event.type == pygame.KEYDOWN
-                    else None
-                )
-                pos = choices.get(pos, None)
-                if pos is not None:
-                    self.turns[self.head.pos] = pos
-
-        for i, cube in enumerate(self.body):
-
-            position = cube.pos
-            if position in self.turns:
-                turn = self.turns[position]
-                cube.move(turn)
-
-                if i == len(self.body) - 1:
-                    self.turns.pop(position)
-            else:
-                # Ensure when we hit the edge of the world we wrap around to the other side
-                # x = left/right
-                # y = up/down
-
-                # Left Wall
-                if cube.direction == FACING.left and cube.pos[0] <= 0:
-                    cube.pos = Position(cube.rows, cube.pos[1])
-
-                # Right Wall
-                elif cube.direction == FACING.right and cube.pos[0] >= cube.rows - 1:
-                    cube.pos = Position(-1, cube.pos[1])
-
-                elif cube.direction == FACING.up and cube.pos[1] <= 0:
-                    cube.pos = Position(cube.pos[0], cube.rows)
-
-                elif cube.direction == FACING.down and cube.pos[1] >= cube.rows - 1:
-                    cube.pos = Position(cube.pos[0], -1)
-                # this needs to be updated to take FACING instead
-                cube.move(cube.direction)
-
-        return True
+    @property
+    def head(self) -> Position:
+        return self.body[0]
 
-    def reset(self, pos):
-        ...
+    def __len__(self) -> int:
+        return len(self.body)
 
-    def add_cube(self):
-        tail = self.body[-1]
+    def steer(self, direction: Facing) -> None:
+        """
+        Turn the head; the rest of the body follows the same cells.
+        """
+        self.direction = direction
 
-        # get direction of tail cube
-        dx, dy = tail.direction
+    def move(self) -> bool:
+        """
+        Move the head one cell on (wrapping around the edges of the world) and drop
+        the tail.
+        :return: False when the head ran into the body.
+        """
+        dx, dy = self.direction
+        head = self.body[0]
+        head = Position((head.row + dx) % self.rows, (head.col + dy) % self.rows)
 
-        # Get old position -- and update it using the direction of movement
-        new_pos = tail.pos
-        new_pos.row = 0 if dx == 0 else (new_pos.row + -dx)
-        new_pos.col = 0 if dy == 0 else (new_pos.col + -dy)
+        self.vacated = self.body.pop()
+        self.occupied.discard(self.vacated)
+        self.free.add(self.vacated)
 
-        # add one more cube to the snake body trailing behind the
-        self.body.append(Cube(new_pos))
+        crashed = head in self.occupied
+        self.body.appendleft(head)
+        self.occupied.add(head)
+        self.free.discard(head)
+        return not crashed
 
-    def draw(self, surface):
-        for index, cube in enumerate(self.body):
-            cube.draw(surface, index == 0)
+    def reset(self, pos):
+        for cell in self.body:
+            self.free.add(cell)
+        self.free.discard(pos)
+        self.body = collections.deque([pos])
+        self.occupied = {pos}
+        self.direction = FACING.right
+        self.vacated = None
 
     def add_tail(self):
-        tail = self.body[-1]
+        """
+        Grow by putting a segment back where the tail just was.
+        """
+        if self.vacated is None or self.vacated in self.occupied:
+            return
+        self.body.append(self.vacated)
+        self.occupied.add(self.vacated)
+        self.free.discard(self.vacated)
+        self.vacated = None
 
-        tail_pos = list(tail.pos)
+    def rect(self, pos: Position) -> typing.Tuple[int, int, int, int]:
+        self._brush.pos = pos
+        return self._brush.rect()
 
-        if tail.direction == FACING.left:
-            tail_pos[0] += 1
-        elif tail.direction == FACING.right:
-            tail_pos[0] -= 1
-        elif tail.direction == FACING.up:
-            tail_pos[1] += 1
-        elif tail.direction == FACING.down:
-            tail_pos[1] -= 1
+    def draw_segment(self, surface, pos: Position) -> None:
+        self._brush.pos = pos
+        self._brush.draw(surface, pos == self.body[0])
 
-        tail_pos = Position(tail_pos[0], tail_pos[1])
-        new_tail = Cube(tail_pos, tail.direction)
-        self.body.append(new_tail)
+    def draw(self, surface):
+        for pos in self.body:
+            self.draw_segment(surface, pos)
 
 
 def draw_grid(surface, size: (int, int), rows: int) -> None:
@@ -193,18 +179,102 @@ def draw_grid(surface, size: (int, int), rows: int) -> None:
         pygame.draw.line(surface, (255, 255, 255), (0, y), (width, y))
 
 
-def random_snack(rows, snake: Snake) -> Position:
-    positions = [s.pos for s in snake.body]
+def random_snack(rows, snake: Snake, rng: random.Random = random) -> typing.Optional[Position]:
+    """
+    A uniformly random cell the snake isn't on, in constant time however long it is;
+    None once the snake fills the board.
+    """
+    if not len(snake.free):
+        return None
+    return snake.free.sample(rng)
+
 
-    while True:
-        x = random.randrange(rows)
-        y = random.randrange(rows)
-        if (x, y) in positions:
-            continue
-        else:
-            break
+class SnakeState(typing.NamedTuple):
+    tick: int
+    head: Position
+    length: int
+    snack: typing.Optional[Position]  # None once the board is full
+    alive: bool
+    won: bool = False  # the snake filled the board
+
+    @property
+    def done(self) -> bool:
+        return not self.alive or self.won
+
+
+class SnakeEngine:
+    """
+    The snake game without pygame's events, clock or display: every call to `step`
+    advances the game by one fixed tick and returns the new state.  Rendering (or
+    anything else) can watch by adding a callable to `observers`.
+    """
+
+    def __init__(self, rows: int = 20, seed: typing.Optional[int] = None):
+        self.rows = rows
+        self.random = random.Random(seed)
+        self.snake = Snake((240, 0, 0), Position(0, 0), rows)
+        self.snack: typing.Optional[Cube] = None
+        self._place_snack()
+        self.tick = 0
+        self.alive = True
+        self.observers: typing.List[typing.Callable[["SnakeEngine", SnakeState], None]] = []
+
+    def _place_snack(self) -> None:
+        pos = random_snack(self.rows, self.snake, self.random)
+        self.snack = None if pos is None else Cube(pos, color=(10, 210, 10))
+
+    @property
+    def won(self) -> bool:
+        return self.snack is None
+
+    def state(self) -> SnakeState:
+        snack = None if self.snack is None else self.snack.pos
+        return SnakeState(self.tick, self.snake.head, len(self.snake), snack, self.alive, self.won)
+
+    def step(self, action: typing.Optional[Facing] = None) -> SnakeState:
+        """
+
+        :param action: A FACING direction to turn to, or None to carry on.
+        """
+        if self.alive and not self.won:
+            self.tick += 1
+            if action is not None:
+                self.snake.steer(action)
 
-    return Position(x, y)
+            # Update snake position
+            self.alive = self.snake.move()
+            # Check if head of snake eats the snack
+            if self.alive and self.snake.head == self.snack.pos:
+                self.snake.add_tail()
+                self._place_snack()  # none left to place when the snake fills the board
+
+        state = self.state()
+        for observer in self.observers:
+            observer(self, state)
+        return state
+
+
+def read_events() -> typing.Tuple[bool, typing.Optional[Facing]]:
+    """
+    Drain pygame's events: returns False when the window was closed and the last arrow key pressed.
+    """
+
+    # Keypresses that are interesting and their direction values.
+    choices = {
+        pygame.K_LEFT: FACING.left,
+        pygame.K_RIGHT: FACING.right,
+        pygame.K_UP: FACING.up,
+        pygame.K_DOWN: FACING.down,
+    }
+
+    turn = None
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            return False, turn
+        elif event.type == pygame.KEYDOWN:
+            turn = choices.get(event.dict.get("key", None), turn)
+
+    return True, turn
 
 
 def main():
@@ -214,45 +284,54 @@ def main():
 
     # instantiate the rendering object (surface), BG colour, and title
     screen = pygame.display.set_mode(size)
-    screen.fill(background_colour)
     pygame.display.set_caption("Snake Game")
 
     # Need a clock to control the tick's per second
     clock = pygame.time.Clock()
 
-    # Create initial board
-    draw_grid(screen, size, 20)
-
-    # Create a snake character
-    snake = Snake((240, 0, 0), Position(0, 0))
-    snack = Cube(random_snack(20, snake), color=(10, 210, 10))
+    # Create initial board -- drawn once and restored under whatever moves
+    renderer = DirtyRenderer(screen, grid_background(size, background_colour, lambda s: draw_grid(s, size, 20)))
+
+    # Create the game, the screen just watches it
+    engine = SnakeEngine(20)
+    engine.snake.draw(screen)
+    engine.snack.draw(screen)
+    previous = {"head": engine.snake.head, "snack": engine.state().snack}
+
+    def draw(game: SnakeEngine, state: SnakeState) -> None:
+        # only the ends of the snake and the snack change: clear the cells they
+        # left and redraw whatever sits there now
+        snake = game.snake
+        changed = {snake.vacated, previous["head"], previous["snack"], state.head, state.snack} - {None}
+        for pos in changed:
+            renderer.restore(snake.rect(pos))
+            if pos in snake.occupied:
+                snake.draw_segment(screen, pos)
+        if game.snack is not None:
+            game.snack.draw(screen)
+        previous["head"], previous["snack"] = state.head, state.snack
+        renderer.update()  # updates only the rect areas that changed
+
+    engine.observers.append(draw)
 
     # Game Loop
     running = True
     while running:
         clock.tick(10)  # 30 would be real time - slower < 30 > faster
 
-        # clear and redraw entire grid (seems inefficient).
-        screen.fill(background_colour)
-        draw_grid(screen, size, 20)
-
-        # Update snake position
-        running = snake.move()
-        # Check if head of snake eats the snack
-        if snake.body[0].pos == snack.pos:
-            snake.add_tail()
-            snack = Cube(random_snack(20, snake), color=(10, 210, 10))
+        running, turn = read_events()
+        if not running:
+            break
+        state = engine.step(turn)
 
-        positions = [s.pos for s in snake.body]
-        if len(positions) != len(set(positions)):
-            print(f"Your Snake length got to be {len(snake.body)} units long!")
+        if state.won:
+            print(f"Your Snake filled the board, {state.length} units long!")
+            running = False
+        elif not state.alive:
+            print(f"Your Snake length got to be {state.length} units long!")
             print("Game Over!")
 
             running = False
-        snake.draw(screen)
-        snack.draw(screen)
-        # pygame.display.flip()  # updates the entire surface
-        pygame.display.update()  # updates the entire surface (Or rect area passed in)
 
 
 if __name__ == "__main__":
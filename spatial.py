@@ -0,0 +1,86 @@
+"""
+Uniform grid spatial hash for moving entities (zombies, towers, bullets).
+
+Entities are filed in square buckets by position, so a range query only looks at
+the buckets the query circle overlaps rather than every entity on the board.
+Positions are (row, col) in cells and may be fractional.
+"""
+import math
+from typing import Dict, Hashable, List, Optional, Set, Tuple, Type
+
+Bucket = Tuple[int, int]
+
+
+class SpatialHash:
+    def __init__(self, bucket_size: float = 4.0) -> None:
+        self.bucket_size = bucket_size
+        self._buckets: Dict[Bucket, Set[Hashable]] = {}
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, entity: Hashable) -> bool:
+        return entity in self._positions
+
+    def _bucket(self, row: float, col: float) -> Bucket:
+        return int(row // self.bucket_size), int(col // self.bucket_size)
+
+    def position(self, entity: Hashable) -> Tuple[float, float]:
+        return self._positions[entity]
+
+    def insert(self, entity: Hashable, row: float, col: float) -> None:
+        if entity in self._positions:
+            self.move(entity, row, col)
+            return
+        self._positions[entity] = (row, col)
+        self._buckets.setdefault(self._bucket(row, col), set()).add(entity)
+
+    def remove(self, entity: Hashable) -> None:
+        row, col = self._positions.pop(entity)
+        key = self._bucket(row, col)
+        bucket = self._buckets[key]
+        bucket.discard(entity)
+        if not bucket:
+            del self._buckets[key]
+
+    def move(self, entity: Hashable, row: float, col: float) -> None:
+        old = self._bucket(*self._positions[entity])
+        new = self._bucket(row, col)
+        self._positions[entity] = (row, col)
+        if old != new:
+            bucket = self._buckets[old]
+            bucket.discard(entity)
+            if not bucket:
+                del self._buckets[old]
+            self._buckets.setdefault(new, set()).add(entity)
+
+    def query(self, row: float, col: float, radius: float, kind: Optional[Type] = None) -> List[Hashable]:
+        """
+        Every entity (optionally only instances of kind) within radius of (row, col).
+        """
+        top, left = self._bucket(row - radius, col - radius)
+        bottom, right = self._bucket(row + radius, col + radius)
+        limit = radius * radius
+        found = []
+        for bucket_row in range(top, bottom + 1):
+            for bucket_col in range(left, right + 1):
+                for entity in self._buckets.get((bucket_row, bucket_col), ()):
+                    if kind is not None and not isinstance(entity, kind):
+                        continue
+                    entity_row, entity_col = self._positions[entity]
+                    if (entity_row - row) ** 2 + (entity_col - col) ** 2 <= limit:
+                        found.append(entity)
+        return found
+
+    def nearest(self, row: float, col: float, radius: float, kind: Optional[Type] = None) -> Optional[Hashable]:
+        """
+        The closest entity (optionally only instances of kind) within radius of (row, col).
+        """
+        best, best_distance = None, math.inf
+        for entity in self.query(row, col, radius, kind):
+            entity_row, entity_col = self._positions[entity]
+            distance = (entity_row - row) ** 2 + (entity_col - col) ** 2
+            if distance < best_distance:
+                best, best_distance = entity, distance
+        return best
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+import pathfinding
+from connectivity import NONE, Components
+from grid import Grid
+
+
+def _random_grid(rng, rows, cols, density):
+    grid = Grid(rows, cols, blocked=(1,))
+    for row in range(rows):
+        for col in range(cols):
+            if rng.random() < density:
+                grid.set(row, col, 1)
+    return grid
+
+
+def _reachable(grid, a, b, avoid=()):
+    """
+    The oracle: a depth first search from a to b that treats avoid as blocked.
+    """
+    if not (grid.passable[a] and grid.passable[b]) or a in avoid or b in avoid:
+        return False
+    seen = set(avoid) | {a}
+    stack = [a]
+    while stack:
+        current = stack.pop()
+        if current == b:
+            return True
+        for offset in grid.offsets:
+            child = current + offset
+            if grid.passable[child] and child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return False
+
+
+def _same_partition(components, grid):
+    fresh = Components(grid)
+    fresh.detach()
+    mapping = {}
+    for index in range(len(grid)):
+        label, expected = components.labels[index], fresh.labels[index]
+        assert (label == NONE) == (expected == NONE)
+        if label != NONE:
+            assert mapping.setdefault(label, expected) == expected
+    assert len(set(mapping.values())) == len(mapping)
+    assert sorted(components.sizes.values()) == sorted(fresh.sizes.values())
+
+
+def test_a_wall_splits_and_a_gap_joins():
+    grid = Grid(5, 5, blocked=(1,))
+    components = Components(grid)
+    top, bottom = grid.index(0, 0), grid.index(4, 4)
+    assert len(components) == 1
+    for col in range(5):
+        grid.set(2, col, 1)
+    assert len(components) == 2 and not components.reachable(top, bottom)
+    assert components.sizes[components.component(top)] == 10
+    grid.set(2, 3, 0)
+    assert len(components) == 1 and components.reachable(top, bottom)
+    assert components.would_disconnect([grid.index(2, 3)], top, bottom)
+    assert not components.would_disconnect([grid.index(0, 3)], top, bottom)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_reachable_matches_search_through_edits(seed):
+    rng = random.Random(seed)
+    grid = _random_grid(rng, 20, 20, 0.35)
+    components = Components(grid)
+    cells = [grid.index(row, col) for row in range(20) for col in range(20)]
+    for step in range(300):
+        grid.set(rng.randrange(20), rng.randrange(20), rng.choice((0, 1)))
+        for _ in range(3):
+            a, b = rng.choice(cells), rng.choice(cells)
+            assert components.reachable(a, b) == _reachable(grid, a, b)
+        if step % 50 == 0:
+            _same_partition(components, grid)
+    _same_partition(components, grid)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_would_disconnect_matches_search(seed):
+    rng = random.Random(seed)
+    grid = _random_grid(rng, 20, 20, 0.3)
+    components = Components(grid)
+    cells = [grid.index(row, col) for row in range(20) for col in range(20)]
+    for _ in range(100):
+        grid.set(rng.randrange(20), rng.randrange(20), rng.choice((0, 1)))
+        a, b = rng.choice(cells), rng.choice(cells)
+        path = pathfinding.grid_bfs(grid, a, b) if grid.passable[a] and grid.passable[b] else None
+        # cuts across a real path are the interesting ones, so most are taken from it
+        pool = path[1:-1] if path and len(path) > 2 and rng.random() < 0.7 else cells
+        cut = [rng.choice(pool) for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.1:
+            cut.append(rng.choice((a, b)))
+        if _reachable(grid, a, b):
+            expected = not _reachable(grid, a, b, avoid=set(cut))
+        else:
+            expected = False
+        assert components.would_disconnect(cut, a, b) == expected
+        assert components.reachable(a, b) == _reachable(grid, a, b)  # nothing was really blocked
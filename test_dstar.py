@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+import pathfinding
+from grid import Grid
+
+ROWS = COLS = 12
+
+
+def _random_grid(rng: random.Random, density: float = 0.3) -> Grid:
+    grid = Grid(ROWS, COLS, blocked=(1,))
+    for row in range(ROWS):
+        for col in range(COLS):
+            if rng.random() < density:
+                grid.set(row, col, 1)
+    grid.set(0, 0, 0)
+    grid.set(ROWS - 1, COLS - 1, 0)
+    return grid
+
+
+def _check(grid: Grid, path, start: int, goal: int) -> None:
+    expected = pathfinding.grid_bfs(grid, start, goal)
+    if expected is None:
+        assert path is None
+        return
+    assert path is not None
+    assert path[0] == start and path[-1] == goal
+    for a, b in zip(path, path[1:]):
+        assert grid.passable[b] and b - a in grid.offsets
+    assert len(path) == len(expected)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_plan_matches_bfs_with_edits_and_moves(seed):
+    rng = random.Random(seed)
+    grid = _random_grid(rng)
+    start, goal = grid.index(0, 0), grid.index(ROWS - 1, COLS - 1)
+    planner = pathfinding.DStarLite(grid, start, goal)
+    for _ in range(40):
+        # edits and moves are interleaved at random, so some plans follow a move
+        # with nothing changed and some follow edits with no move
+        if rng.random() < 0.5:
+            for _ in range(rng.randint(1, 4)):
+                row, col = rng.randrange(ROWS), rng.randrange(COLS)
+                if grid.index(row, col) not in (start, goal):
+                    grid.set(row, col, rng.choice((0, 1)))
+        if rng.random() < 0.7:
+            moves = grid.neighbours(start)
+            if moves:
+                start = rng.choice(moves)
+                planner.move_to(start)
+        _check(grid, planner.plan(), start, goal)
+
+
+def test_move_and_plan_without_edits_then_edit_and_move():
+    grid = Grid(5, 5, blocked=(1,))
+    a, b, c, goal = grid.index(0, 0), grid.index(0, 1), grid.index(1, 1), grid.index(4, 4)
+    planner = pathfinding.DStarLite(grid, a, goal)
+    _check(grid, planner.plan(), a, goal)
+    planner.move_to(b)
+    _check(grid, planner.plan(), b, goal)
+    for col in range(1, 5):
+        grid.set(2, col, 1)
+    planner.move_to(c)
+    _check(grid, planner.plan(), c, goal)
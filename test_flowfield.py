@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import pathfinding
+from flowfield import UNREACHABLE, FlowField
+from grid import Grid
+
+ROWS = COLS = 15
+
+
+def _random_grid(rng: random.Random, density: float = 0.3) -> Grid:
+    grid = Grid(ROWS, COLS, blocked=(1,))
+    for row in range(ROWS):
+        for col in range(COLS):
+            if rng.random() < density:
+                grid.set(row, col, 1)
+    return grid
+
+
+def _check(grid: Grid, field: FlowField) -> None:
+    field.refresh()
+    for row in range(ROWS):
+        for col in range(COLS):
+            index = grid.index(row, col)
+            path = pathfinding.grid_bfs(grid, index, field.goal) if grid.passable[index] else None
+            expected = UNREACHABLE if path is None else len(path) - 1
+            assert field.distance[index] == expected, (row, col)
+            step = field.next_step(index)
+            if path is None:
+                assert step is None
+            elif index != field.goal:
+                assert step in grid.neighbours(index)
+                assert field.distance[step] == expected - 1
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_distances_match_bfs_through_edits(seed):
+    rng = random.Random(seed)
+    grid = _random_grid(rng)
+    goal = grid.index(ROWS // 2, COLS // 2)
+    grid.set(ROWS // 2, COLS // 2, 0)
+    field = FlowField(grid, goal)
+    _check(grid, field)
+    for _ in range(10):
+        for _ in range(rng.randint(1, 6)):
+            row, col = rng.randrange(ROWS), rng.randrange(COLS)
+            if grid.index(row, col) != goal:
+                grid.set(row, col, rng.choice((0, 1)))
+        _check(grid, field)
+    field.detach()
@@ -0,0 +1,73 @@
+import random
+from collections import deque
+
+import pytest
+
+import generators
+import pathfinding
+from grid import Grid
+
+
+def _open_cells_reached(grid, start):
+    seen = {start}
+    frontier = deque([start])
+    while frontier:
+        cell = frontier.popleft()
+        for neighbour in grid.neighbours(cell):
+            if neighbour not in seen:
+                seen.add(neighbour)
+                frontier.append(neighbour)
+    return seen
+
+
+@pytest.mark.parametrize("method", sorted(generators.GENERATORS))
+@pytest.mark.parametrize("seed", range(10))
+def test_start_is_connected_to_goal(method, seed):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(2, 40), rng.randint(2, 40)
+    grid, start, goal = generators.GENERATORS[method](rows, cols, rng=random.Random(seed))
+    assert (grid.rows, grid.cols) == (rows, cols)
+    a, b = grid.index(*start), grid.index(*goal)
+    assert grid.passable[a] and grid.passable[b]
+    assert pathfinding.grid_bfs(grid, a, b) is not None
+    assert generators.connected(grid, a, b)
+
+
+@pytest.mark.parametrize("method", ["backtracker", "kruskal", "wilson"])
+@pytest.mark.parametrize("seed", range(5))
+def test_perfect_mazes_reach_every_open_cell(method, seed):
+    grid, start, _ = generators.GENERATORS[method](21, 31, rng=random.Random(seed))
+    reached = _open_cells_reached(grid, grid.index(*start))
+    assert reached == {i for i in range(len(grid)) if grid.passable[i]}
+
+
+@pytest.mark.parametrize("method", sorted(generators.GENERATORS))
+def test_same_seed_same_maze(method):
+    first = generators.GENERATORS[method](30, 30, rng=random.Random(7))
+    second = generators.GENERATORS[method](30, 30, rng=random.Random(7))
+    other = generators.GENERATORS[method](30, 30, rng=random.Random(8))
+    assert bytes(first[0].cells) == bytes(second[0].cells)
+    assert first[1:] == second[1:]
+    assert bytes(first[0].cells) != bytes(other[0].cells)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_connected_matches_bfs(seed):
+    rng = random.Random(seed)
+    grid = Grid(15, 15, blocked=(1,))
+    for row in range(15):
+        for col in range(15):
+            if rng.random() < 0.4:
+                grid.set(row, col, 1)
+    cells = [grid.index(row, col) for row in range(15) for col in range(15)]
+    for _ in range(20):
+        a, b = rng.choice(cells), rng.choice(cells)
+        expected = grid.passable[a] and grid.passable[b] and pathfinding.grid_bfs(grid, a, b) is not None
+        assert generators.connected(grid, a, b) == expected
+
+
+def test_generate_with_a_seed_is_repeatable():
+    first = generators.generate("wilson", 20, 25, seed=3)
+    second = generators.generate("wilson", 20, 25, seed=3)
+    assert bytes(first.grid.cells) == bytes(second.grid.cells)
+    assert (first.start, first.goal) == (second.start, second.goal)
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import pathfinding
+from grid import Grid
+from hpa import HierarchicalPathfinder
+
+ROWS, COLS = 24, 30
+
+
+def _random_grid(rng: random.Random, density: float = 0.25) -> Grid:
+    grid = Grid(ROWS, COLS, blocked=(1,))
+    for row in range(ROWS):
+        for col in range(COLS):
+            if rng.random() < density:
+                grid.set(row, col, 1)
+    return grid
+
+
+def _queries(grid: Grid, hpa: HierarchicalPathfinder, rng: random.Random) -> None:
+    for _ in range(15):
+        start = grid.index(rng.randrange(ROWS), rng.randrange(COLS))
+        goal = grid.index(rng.randrange(ROWS), rng.randrange(COLS))
+        if not (grid.passable[start] and grid.passable[goal]):
+            assert hpa.find_path(start, goal) is None
+            continue
+        expected = pathfinding.grid_bfs(grid, start, goal)
+        path = hpa.find_path(start, goal)
+        if expected is None:
+            assert path is None
+            continue
+        # near optimal: a real path, never shorter than the shortest one
+        assert path is not None
+        assert path[0] == start and path[-1] == goal
+        for a, b in zip(path, path[1:]):
+            assert grid.passable[b] and b - a in grid.offsets
+        assert len(path) >= len(expected)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_paths_against_bfs_through_edits(seed):
+    rng = random.Random(seed)
+    grid = _random_grid(rng)
+    hpa = HierarchicalPathfinder(grid, cluster_size=6)
+    _queries(grid, hpa, rng)
+    for _ in range(5):
+        for _ in range(rng.randint(1, 10)):
+            grid.set(rng.randrange(ROWS), rng.randrange(COLS), rng.choice((0, 1)))
+        _queries(grid, hpa, rng)
+    hpa.detach()
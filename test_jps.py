@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+import pathfinding
+from grid import Grid
+
+
+def _random_grid(rng: random.Random, rows: int, cols: int, density: float) -> Grid:
+    grid = Grid(rows, cols, blocked=(1,))
+    for row in range(rows):
+        for col in range(cols):
+            if rng.random() < density:
+                grid.set(row, col, 1)
+    return grid
+
+
+@pytest.mark.parametrize("density", [0.0, 0.2, 0.35])
+@pytest.mark.parametrize("seed", range(10))
+def test_path_length_matches_bfs(seed, density):
+    rng = random.Random(seed)
+    grid = _random_grid(rng, 20, 25, density)
+    for _ in range(20):
+        start = grid.index(rng.randrange(20), rng.randrange(25))
+        goal = grid.index(rng.randrange(20), rng.randrange(25))
+        if not (grid.passable[start] and grid.passable[goal]):
+            continue
+        expected = pathfinding.grid_bfs(grid, start, goal)
+        path = pathfinding.grid_jps(grid, start, goal)
+        if expected is None:
+            assert path is None
+            continue
+        assert path[0] == start and path[-1] == goal
+        for a, b in zip(path, path[1:]):
+            assert grid.passable[b] and b - a in grid.offsets
+        assert len(path) == len(expected)
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+import mazefile
+from grid import Grid
+
+
+def _random_grid(rng, rows, cols):
+    grid = Grid(rows, cols, blocked=(1,))
+    for row in range(rows):
+        for col in range(cols):
+            grid.set(row, col, rng.choice((0, 0, 0, 1, 2, 3)))
+    return grid
+
+
+@pytest.mark.parametrize("rle", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip(tmp_path, seed, rle):
+    rng = random.Random(seed)
+    rows, cols = rng.randint(1, 40), rng.randint(1, 40)
+    grid = _random_grid(rng, rows, cols)
+    start, goal = (0, 0), (rows - 1, cols - 1)
+    path = str(tmp_path / "maze.bin")
+    mazefile.save(path, grid, start, goal, rle=rle)
+
+    loaded, loaded_start, loaded_goal = mazefile.load(path)
+    assert (loaded.rows, loaded.cols) == (rows, cols)
+    assert (loaded_start, loaded_goal) == (start, goal)
+    assert bytes(loaded.cells) == bytes(grid.cells)
+    assert bytes(loaded.passable) == bytes(grid.passable)
+
+
+def test_rle_is_smaller_for_uniform_maps(tmp_path):
+    grid = Grid(50, 50, blocked=(1,))
+    raw, rle = tmp_path / "raw.bin", tmp_path / "rle.bin"
+    mazefile.save(str(raw), grid, (0, 0), (49, 49))
+    mazefile.save(str(rle), grid, (0, 0), (49, 49), rle=True)
+    assert rle.stat().st_size < raw.stat().st_size
+
+
+def test_edits_to_a_loaded_grid_do_not_reach_the_file(tmp_path):
+    path = str(tmp_path / "maze.bin")
+    mazefile.save(path, Grid(5, 5, blocked=(1,)), (0, 0), (4, 4))
+    grid, _, _ = mazefile.load(path)
+    grid.set(2, 2, 1)
+    assert not grid.passable[grid.index(2, 2)]
+    grid, _, _ = mazefile.load(path)
+    assert grid.passable[grid.index(2, 2)]
+
+
+def test_bad_files_are_rejected(tmp_path):
+    path = tmp_path / "maze.bin"
+    path.write_bytes(b"MA")
+    with pytest.raises(ValueError, match="too short"):
+        mazefile.load(str(path))
+    path.write_bytes(b"NOPE" + bytes(mazefile.HEADER.size))
+    with pytest.raises(ValueError, match="not a maze file"):
+        mazefile.load(str(path))
+    mazefile.save(str(path), Grid(5, 5, blocked=(1,)), (0, 0), (4, 4))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError, match="truncated"):
+        mazefile.load(str(path))
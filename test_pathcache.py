@@ -0,0 +1,89 @@
+import random
+
+import pathfinding
+from grid import Grid
+from pathcache import PathCache
+
+
+def test_repeat_query_is_a_hit():
+    grid = Grid(10, 10, blocked=(1,))
+    cache = PathCache(grid)
+    start, goal = grid.index(0, 0), grid.index(9, 9)
+    path = cache.find_path(start, goal)
+    assert cache.find_path(start, goal) is path
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_blocking_a_cell_on_the_path_evicts_it():
+    grid = Grid(10, 10, blocked=(1,))
+    cache = PathCache(grid)
+    start, goal = grid.index(0, 0), grid.index(0, 9)
+    path = cache.find_path(start, goal)
+    assert len(path) == 10
+    row, col = grid.location(path[5])
+    grid.set(row, col, 1)
+    assert len(cache) == 0 and cache.invalidations == 1
+    path = cache.find_path(start, goal)
+    assert grid.index(row, col) not in path
+    assert len(path) == len(pathfinding.grid_bfs(grid, start, goal))
+
+
+def test_blocking_a_cell_off_the_path_keeps_it():
+    grid = Grid(10, 10, blocked=(1,))
+    cache = PathCache(grid)
+    start, goal = grid.index(0, 0), grid.index(0, 9)
+    cache.find_path(start, goal)
+    grid.set(9, 9, 1)
+    assert len(cache) == 1 and cache.invalidations == 0
+
+
+def test_opening_a_shortcut_evicts_the_longer_path():
+    grid = Grid(5, 5, blocked=(1,))
+    for col in range(5):
+        if col != 4:
+            grid.set(2, col, 1)  # a wall with a gap at the far end
+    cache = PathCache(grid)
+    start, goal = grid.index(0, 0), grid.index(4, 0)
+    assert len(cache.find_path(start, goal)) == 13
+    grid.set(2, 0, 0)
+    assert len(cache) == 0
+    assert len(cache.find_path(start, goal)) == 5
+
+
+def test_opening_a_cell_evicts_no_path_answers():
+    grid = Grid(5, 5, blocked=(1,))
+    for col in range(5):
+        grid.set(2, col, 1)
+    cache = PathCache(grid)
+    start, goal = grid.index(0, 0), grid.index(4, 4)
+    assert cache.find_path(start, goal) is None
+    grid.set(2, 3, 0)
+    assert len(cache) == 0
+    assert cache.find_path(start, goal) is not None
+
+
+def test_blocked_start_is_not_cached():
+    grid = Grid(5, 5, blocked=(1,))
+    grid.set(0, 0, 1)
+    cache = PathCache(grid)
+    assert cache.find_path(grid.index(0, 0), grid.index(4, 4)) is None
+    assert len(cache) == 0
+
+
+def test_answers_stay_right_through_random_edits():
+    rng = random.Random(1)
+    grid = Grid(12, 12, blocked=(1,))
+    cache = PathCache(grid, capacity=16)
+    cells = [grid.index(row, col) for row in range(12) for col in range(12)]
+    queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(20)]
+    for _ in range(200):
+        grid.set(rng.randrange(12), rng.randrange(12), rng.choice((0, 0, 1)))
+        start, goal = rng.choice(queries)
+        path = cache.find_path(start, goal)
+        expected = pathfinding.grid_bfs(grid, start, goal) if grid.passable[start] and grid.passable[goal] else None
+        if expected is None:
+            assert path is None
+        else:
+            assert path is not None and len(path) == len(expected)
+            assert all(grid.passable[cell] for cell in path)
+    assert cache.hits
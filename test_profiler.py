@@ -0,0 +1,26 @@
+from profiler import Profiler
+
+
+def _profiler(values):
+    profiler = Profiler(window=len(values))
+    for value in values:
+        profiler.begin_frame()
+        profiler.count("nodes", value)
+        profiler.end_frame()
+    return profiler
+
+
+def test_percentile_nearest_rank():
+    profiler = _profiler(range(1, 301))
+    assert profiler.percentile("nodes", 99) == 297
+    assert profiler.percentile("nodes", 50) == 150
+    assert profiler.percentile("nodes", 100) == 300
+    assert profiler.percentile("nodes", 0) == 1
+
+    profiler = _profiler(range(1, 101))
+    assert profiler.percentile("nodes", 99) == 99
+    assert profiler.percentile("nodes", 50) == 50
+
+
+def test_percentile_without_frames():
+    assert Profiler().percentile("nodes", 99) == 0.0
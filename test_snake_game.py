@@ -0,0 +1,20 @@
+from snake_game import FACING, Position, SnakeEngine
+
+# round a 2 x 2 board and back to the start, a step in each direction
+CYCLE = [Position(0, 0), Position(1, 0), Position(1, 1), Position(0, 1)]
+TURNS = [FACING.right, FACING.down, FACING.left, FACING.up]
+
+
+def test_filling_the_board_wins():
+    engine = SnakeEngine(rows=2, seed=0)
+    state = engine.state()
+    for _ in range(200):
+        if state.done:
+            break
+        state = engine.step(TURNS[CYCLE.index(state.head)])
+    assert state.won and state.alive
+    assert state.length == 4
+    assert state.snack is None
+
+    # a finished game stays as it is
+    assert engine.step(FACING.right) == state
@@ -0,0 +1,295 @@
+"""
+A very large (practically endless) maze made of chunks created on demand.
+
+The world is cut into square chunks of CHUNK_SIZE x CHUNK_SIZE cells.  A chunk
+is only generated -- from the world's seed and its own coordinates, so the same
+chunk always comes back the same -- the first time a cell in it is looked at,
+whether by the camera drawing it or a search walking into it.  Memory scales with
+the area visited rather than the size of the world, and with `max_chunks` chunks
+nobody has edited are dropped (least recently used first) and simply generated
+again if they are needed later (though never in the middle of a search).
+
+Rows and columns can be any integer, negative ones included.  Cell codes are the
+same as maze_game's, a byte per cell.
+
+    python world.py     # arrow keys scroll, left click builds a wall
+"""
+import random
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import pygame
+
+import pathfinding
+from maze_game import CELL_CODE, CELL_COLOUR, Colour, Location, manhattan_distance
+
+CHUNK_SIZE = 32
+
+Key = Tuple[int, int]  # (chunk row, chunk col)
+
+
+class World:
+    def __init__(
+            self,
+            seed: int = 0,
+            sparseness: float = 0.3,
+            chunk_size: int = CHUNK_SIZE,
+            max_chunks: Optional[int] = None,
+    ) -> None:
+        """
+
+        :param seed: Picks the world; each chunk is generated from it and the chunk's position.
+        :param sparseness: Share of cells that are filled, as for Maze._randomly_fill.
+        :param chunk_size: Cells along each side of a chunk.
+        :param max_chunks: Most unedited chunks kept in memory, unlimited when not given.
+        """
+        self.seed = seed
+        self.sparseness = sparseness
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks: OrderedDict[Key, bytearray] = OrderedDict()  # least recently used first
+        self.edited: Set[Key] = set()  # chunks that can't be generated again, never dropped
+        self.generated = 0  # chunks made (or made again) so far
+        self.surfaces: Dict[Key, pygame.Surface] = {}  # drawing state for loaded chunks, see Camera
+        self._pinned = False  # nothing is dropped while a search is running
+
+        self.blocked = CELL_CODE[Colour.BLOCKED]
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def _generate(self, key: Key) -> bytearray:
+        # the same chunk has to come back every time, whatever was generated before it
+        rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+        snack, blocked = CELL_CODE[Colour.SNACK], CELL_CODE[Colour.BLOCKED]
+        codes = bytearray(self.chunk_size * self.chunk_size)  # all EMPTY
+        for i in range(len(codes)):
+            if rng.uniform(0, 1.0) < self.sparseness:
+                codes[i] = snack if rng.randint(0, 5) == 5 else blocked
+        self.generated += 1
+        return codes
+
+    def chunk(self, key: Key) -> bytearray:
+        """
+        The cell codes of a chunk, row-major, generated the first time it is asked for.
+        """
+        codes = self.chunks.get(key)
+        if codes is not None:
+            self.chunks.move_to_end(key)
+            return codes
+
+        codes = self.chunks[key] = self._generate(key)
+        self._trim()
+        return codes
+
+    def _trim(self) -> None:
+        # drop unedited chunks, least recently used first, until within max_chunks
+        if self.max_chunks is None or self._pinned:
+            return
+        excess = len(self.chunks) - self.max_chunks
+        if excess <= 0:
+            return
+        for old in list(self.chunks)[:-1]:  # never the chunk just used
+            if excess <= 0:
+                break
+            if old not in self.edited:
+                del self.chunks[old]
+                self.surfaces.pop(old, None)
+                excess -= 1
+
+    def locate(self, row: int, col: int) -> Tuple[Key, int]:
+        """
+        The chunk a cell is in and the cell's index inside it.
+        """
+        size = self.chunk_size
+        chunk_row, local_row = divmod(row, size)
+        chunk_col, local_col = divmod(col, size)
+        return (chunk_row, chunk_col), local_row * size + local_col
+
+    def get(self, row: int, col: int) -> int:
+        key, i = self.locate(row, col)
+        return self.chunk(key)[i]
+
+    def set(self, row: int, col: int, code: int) -> None:
+        key, i = self.locate(row, col)
+        self.chunk(key)[i] = code
+        self.edited.add(key)
+
+    def paint(self, loc: Location, colour: Colour) -> None:
+        self.set(loc.row, loc.col, CELL_CODE[colour])
+
+    def successors(self, loc: Location) -> List[Location]:
+        """
+        The open cells next to loc -- up, down, left, right like Maze.successors --
+        loading any chunk they are in.
+        """
+        row, col = loc
+        blocked, size = self.blocked, self.chunk_size
+        key, i = self.locate(row, col)
+        codes = self.chunk(key)
+        local_row, local_col = divmod(i, size)
+        found = []
+        # neighbours inside the same chunk are read straight from it
+        if local_row > 0:
+            if codes[i - size] != blocked:
+                found.append(Location(row - 1, col))
+        elif self.get(row - 1, col) != blocked:
+            found.append(Location(row - 1, col))
+        if local_row < size - 1:
+            if codes[i + size] != blocked:
+                found.append(Location(row + 1, col))
+        elif self.get(row + 1, col) != blocked:
+            found.append(Location(row + 1, col))
+        if local_col > 0:
+            if codes[i - 1] != blocked:
+                found.append(Location(row, col - 1))
+        elif self.get(row, col - 1) != blocked:
+            found.append(Location(row, col - 1))
+        if local_col < size - 1:
+            if codes[i + 1] != blocked:
+                found.append(Location(row, col + 1))
+        elif self.get(row, col + 1) != blocked:
+            found.append(Location(row, col + 1))
+        return found
+
+    def solve(self, start: Location, goal: Location, margin: int = 1) -> List[Location]:
+        """
+        A* from start to goal; only the chunks the search walks into are loaded.
+
+        :param margin: How many chunks beyond the box around start and goal the search
+            may wander; without a bound a search for an unreachable goal never ends.
+        :return: The path, empty when there is none within the bounds.
+        """
+        pad = margin * self.chunk_size
+        top, bottom = min(start.row, goal.row) - pad, max(start.row, goal.row) + pad
+        left, right = min(start.col, goal.col) - pad, max(start.col, goal.col) + pad
+
+        def successors(loc: Location) -> List[Location]:
+            return [n for n in self.successors(loc) if top <= n.row <= bottom and left <= n.col <= right]
+
+        # the search keeps coming back to the chunks in the box, dropping them as it
+        # goes would only have them generated again; max_chunks applies once it is done
+        self._pinned = True
+        try:
+            node = pathfinding.astar(start, goal.__eq__, successors, manhattan_distance(goal))
+        finally:
+            self._pinned = False
+            self._trim()
+        return pathfinding.node_to_path(node) if node is not None else []
+
+
+class Camera:
+    """
+    A window onto a World: only the chunks it can see are loaded and drawn.
+
+    Each loaded chunk's bytes are wrapped (without copying) as an 8-bit palette
+    surface, the same way render.TileBatch draws a Grid, so a frame is a scale and a
+    blit per visible chunk plus the grid lines.
+    """
+
+    def __init__(self, world: World, size: Tuple[int, int] = (500, 500), cell_size: int = 10) -> None:
+        self.world = world
+        self.size = size
+        self.cell_size = cell_size
+        self.row = 0  # top left cell on screen
+        self.col = 0
+        self._palette = [tuple(colour) for colour in CELL_COLOUR] + [(0, 0, 0)] * (256 - len(CELL_COLOUR))
+        self._scaled: Optional[pygame.Surface] = None  # reused by every chunk, made by the first
+
+    @property
+    def rows(self) -> int:
+        return -(-self.size[1] // self.cell_size)
+
+    @property
+    def cols(self) -> int:
+        return -(-self.size[0] // self.cell_size)
+
+    def move(self, rows: int, cols: int) -> None:
+        self.row += rows
+        self.col += cols
+
+    def centre_on(self, loc: Location) -> None:
+        self.row = loc.row - self.rows // 2
+        self.col = loc.col - self.cols // 2
+
+    def to_cell(self, x: int, y: int) -> Location:
+        """
+        The world cell under a point on screen.
+        """
+        return Location(self.row + y // self.cell_size, self.col + x // self.cell_size)
+
+    def visible_chunks(self) -> Iterator[Key]:
+        size = self.world.chunk_size
+        for chunk_row in range(self.row // size, (self.row + self.rows - 1) // size + 1):
+            for chunk_col in range(self.col // size, (self.col + self.cols - 1) // size + 1):
+                yield chunk_row, chunk_col
+
+    def _surface(self, key: Key) -> pygame.Surface:
+        world = self.world
+        codes = world.chunk(key)
+        surface = world.surfaces.get(key)
+        if surface is None:
+            surface = pygame.image.frombuffer(codes, (world.chunk_size, world.chunk_size), "P")
+            surface.set_palette(self._palette)
+            world.surfaces[key] = surface
+        return surface
+
+    def draw(self, surface: pygame.Surface, background: tuple = (20, 20, 20)) -> None:
+        surface.fill(background)
+        size, length = self.world.chunk_size, self.cell_size
+        side = size * length
+        for key in self.visible_chunks():
+            chunk = self._surface(key)
+            if self._scaled is None:
+                self._scaled = pygame.transform.scale(chunk, (side, side))
+            else:
+                pygame.transform.scale(chunk, (side, side), self._scaled)
+            x = (key[1] * size - self.col) * length
+            y = (key[0] * size - self.row) * length
+            surface.blit(self._scaled, (x, y))
+
+        width, height = self.size
+        for x in range(length, width, length):
+            pygame.draw.line(surface, Colour.LINE, (x, 0), (x, height))
+        for y in range(length, height, length):
+            pygame.draw.line(surface, Colour.LINE, (0, y), (width, y))
+
+
+def main(seed: int = 0):
+    tick_time = 30
+    size = (500, 500)
+    world = World(seed, max_chunks=256)
+    camera = Camera(world, size)
+
+    screen = pygame.display.set_mode(size)
+    clock = pygame.time.Clock()
+    scroll = {
+        pygame.K_LEFT: (0, -1),
+        pygame.K_RIGHT: (0, 1),
+        pygame.K_UP: (-1, 0),
+        pygame.K_DOWN: (1, 0),
+    }
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+                break
+
+        keys = pygame.key.get_pressed()
+        for key, (rows, cols) in scroll.items():
+            if keys[key]:
+                camera.move(rows, cols)
+
+        if pygame.mouse.get_pressed() == (1, 0, 0):
+            world.paint(camera.to_cell(*pygame.mouse.get_pos()), Colour.WALL)
+
+        clock.tick(tick_time)
+        camera.draw(screen)
+        pygame.display.update()
+        pygame.display.set_caption(f"World ({camera.row}, {camera.col}) -- {len(world)} chunks loaded")
+
+
+if __name__ == "__main__":
+    main()